@@ -0,0 +1,45 @@
+"""
+Benchmark of the load throughput of the parser, in clauses per second.
+Run with:  python -m benchmarks.load [number of clauses]
+"""
+import sys
+import time
+
+from src.interpreter.prolog_parser import PrologParser
+
+
+def generate_program(size: int) -> str:
+    """
+    Generates a program of facts with a rule every tenth clause
+    """
+    lines: list[str] = []
+    for i in range(size):
+        if i % 10 == 9:
+            lines.append(f"rule{i}(X, Y) :- parent(X, Z), not(parent(Z, Y)).")
+        else:
+            lines.append(f"parent(p{i % 1000}, c{i}, [a, 'b c', {i}]).")
+
+    return "\n".join(lines) + "\n"
+
+
+def measure(program: str, size: int, repeat: int = 3) -> float:
+    """
+    :Returns: the best load throughput over a few runs, in clauses per second
+    """
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        PrologParser(program).parse_program()
+        best = min(best, time.perf_counter() - start)
+
+    return size / best
+
+
+def main() -> None:
+    size: int = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    program: str = generate_program(size)
+    print(f"load: {size} clauses, {measure(program, size):.0f} clauses/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmark suite of the interpreter hot paths: tokenizing, parsing,
+loading and querying generated workloads with every engine.
+Results are saved as JSON, so that runs can be compared.
+Run with:  python -m benchmarks.suite [--scale S] [--out FILE] [--compare OLD] [--no-memory]
+"""
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple, Union
+
+from src.interpreter.tokenizer import Tokenizer
+from src.interpreter.prolog_parser import PrologParser
+from src.interpreter.knowledge_base import KnowledgeBase
+from src.interpreter.interpreter import Interpreter
+
+from benchmarks.workloads import Workload, workloads, parse_input
+
+Result = Dict[str, object]
+
+# tracing allocations slows the interpreter down a few times
+MEASURE_MEMORY: bool = True
+
+# the engines whose inferences are goal resolutions, comparable between them,
+# Datalog only counts its derivations and answers
+COUNTS_INFERENCES: Tuple[str, ...] = ('sld', 'machine')
+
+
+def best_time(run: Callable[[], object], repeat: int) -> float:
+    """
+    :Returns: the best time of a few runs, in seconds
+    """
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def peak_memory(run: Callable[[], object]) -> Union[int, None]:
+    """
+    :Returns: the most memory allocated during a run, in bytes,
+              or None if memory is not measured
+    """
+    if not MEASURE_MEMORY:
+        return None
+
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_parse(megabytes: float, repeat: int) -> Result:
+    """
+    Times the tokenizer and the parser on a large program
+    """
+    src: str = parse_input(megabytes)
+    clauses: int = src.count("\n")
+
+    tokenize: float = best_time(lambda: sum(1 for _ in Tokenizer().scan(src)), repeat)
+    parse: float = best_time(lambda: PrologParser(src).parse_program(), repeat)
+
+    return {"bytes": len(src),
+            "clauses": clauses,
+            "tokenize_seconds": tokenize,
+            "parse_seconds": parse,
+            "megabytes_per_second": len(src) / 1_000_000 / parse,
+            "clauses_per_second": clauses / parse,
+            "parse_peak_bytes": peak_memory(lambda: PrologParser(src).parse_program())}
+
+
+def bench_query(kb: KnowledgeBase, engine: str, query: str, repeat: int) -> Result:
+    """
+    Times finding all the answers of a query,
+    each run on a fresh interpreter, so nothing is cached between runs
+    """
+    def loaded() -> Interpreter:
+        return Interpreter(kb, engine)
+
+    best: float = float("inf")
+    answers: int = 0
+    inferences: int = 0
+    for _ in range(repeat):
+        intr: Interpreter = loaded()
+        start: float = time.perf_counter()
+        answers = sum(1 for _ in intr.answers(query))
+        best = min(best, time.perf_counter() - start)
+        inferences = intr.monitor.inferences
+
+    counted: bool = engine in COUNTS_INFERENCES
+    intr = loaded()
+    return {"answers": answers,
+            "seconds": best,
+            "inferences": inferences if counted else None,
+            "inferences_per_second": inferences / best if counted and best else None,
+            "peak_bytes": peak_memory(lambda: sum(1 for _ in intr.answers(query)))}
+
+
+def bench_workload(workload: Workload, repeat: int) -> Result:
+    """
+    Times loading a workload and running its queries, with each of its engines
+    """
+    load: float = best_time(lambda: Interpreter().load_base(workload.program), repeat)
+    # the queries do not change the clauses, so they share a knowledge base
+    kb: KnowledgeBase = PrologParser(workload.program).parse_program()
+    engines: Result = {}
+    for engine in workload.engines:
+        engines[engine] = {query: bench_query(kb, engine, query, repeat)
+                           for query in workload.queries}
+
+    return {"load_seconds": load, "engines": engines}
+
+
+def run(scale: float, repeat: int, megabytes: float) -> Result:
+    """
+    Runs the whole suite
+    """
+    results: Result = {"python": platform.python_version(),
+                       "scale": scale,
+                       "repeat": repeat,
+                       "parse": bench_parse(megabytes, repeat),
+                       "workloads": {}}
+
+    for workload in workloads(scale):
+        print(f"{workload.name} ...", flush=True)
+        results["workloads"][workload.name] = bench_workload(workload, repeat)
+
+    return results
+
+
+def timings(results: Result, prefix: str = "") -> Dict[str, float]:
+    """
+    Flattens the timings of a run, keyed by their path in the results
+    """
+    flat: Dict[str, float] = {}
+    for key, value in results.items():
+        path: str = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(timings(value, path))
+        elif key.endswith("seconds") and isinstance(value, float):
+            flat[path] = value
+
+    return flat
+
+
+def compare(old: Result, new: Result) -> List[Tuple[str, float, float]]:
+    """
+    :Returns: the timings found in both runs, old and new
+    """
+    old_times: Dict[str, float] = timings(old)
+    return [(path, old_times[path], seconds)
+            for path, seconds in timings(new).items()
+            if path in old_times]
+
+
+def megabytes(size: Union[int, None]) -> str:
+    """
+    Formats a peak memory
+    """
+    return "-" if size is None else f"{size / 1_000_000:.1f} MB"
+
+
+def rate(per_second: Union[float, None]) -> str:
+    """
+    Formats the inferences per second
+    """
+    return "-" if per_second is None else f"{per_second:.0f}"
+
+
+def report(results: Result) -> None:
+    """
+    Prints a summary of a run
+    """
+    parse: Result = results["parse"]
+    print(f"parse: {parse['bytes'] / 1_000_000:.1f} MB, "
+          f"tokenize {parse['tokenize_seconds']:.3f} s, "
+          f"parse {parse['parse_seconds']:.3f} s, "
+          f"{parse['clauses_per_second']:.0f} clauses/sec, "
+          f"peak {megabytes(parse['parse_peak_bytes'])}")
+
+    for name, workload in results["workloads"].items():
+        print(f"{name}: load {workload['load_seconds']:.3f} s")
+        for engine, queries in workload["engines"].items():
+            for query, res in queries.items():
+                print(f"  {engine:8} {query[:40]:40} {res['answers']:7} answers "
+                      f"{res['seconds']:8.4f} s {rate(res['inferences_per_second']):>10} inf/s "
+                      f"peak {megabytes(res['peak_bytes'])}")
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="shrinks or grows the workloads")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per timing, the best one is kept")
+    parser.add_argument("--megabytes", type=float, default=2.0,
+                        help="size of the program parsed")
+    parser.add_argument("--out", default="benchmark.json",
+                        help="where the results are saved")
+    parser.add_argument("--compare", help="the results of an earlier run")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skips measuring peak memory, which is slow")
+    args: argparse.Namespace = parser.parse_args()
+
+    global MEASURE_MEMORY
+    MEASURE_MEMORY = not args.no_memory
+
+    results: Result = run(args.scale, args.repeat, args.megabytes)
+    report(results)
+
+    with open(args.out, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            old: Result = json.load(file)
+
+        print(f"\ncompared to {args.compare}:")
+        for path, before, after in compare(old, results):
+            print(f"  {after / before:6.2f}x  {before:8.4f} s -> {after:8.4f} s  {path}")
+
+
+if __name__ == "__main__":
+    main()
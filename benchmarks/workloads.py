@@ -0,0 +1,136 @@
+"""
+Generated programs and queries for the benchmark suite.
+Lists have no head/tail syntax here, so the search workloads
+are generated for a fixed size instead of recursing over lists
+"""
+from typing import List, NamedTuple, Tuple
+
+ENGINES: Tuple[str, ...] = ('sld', 'machine', 'datalog')
+
+
+class Workload(NamedTuple):
+    """
+    A program, the queries run against it and the engines which can run them
+    """
+    name: str
+    program: str
+    queries: Tuple[str, ...]
+    engines: Tuple[str, ...] = ENGINES
+
+
+def ancestor_chain(depth: int) -> Workload:
+    """
+    A single chain of parents, the ancestors of its first person are all the others
+    """
+    lines: List[str] = [f"parent(p{i}, p{i + 1})." for i in range(depth)]
+    lines.append("ancestor(X, Y) :- parent(X, Y).")
+    lines.append("ancestor(X, Y) :- parent(X, Z), ancestor(Z, Y).")
+
+    # the recursive SLD engine is bounded by the Python stack
+    return Workload(f"ancestor_chain_{depth}", "\n".join(lines) + "\n",
+                    ("ancestor(p0, X).", f"ancestor(X, p{depth})."),
+                    ('machine', 'datalog') if depth > 150 else ENGINES)
+
+
+def wide_facts(rows: int, keys: int = 1000) -> Workload:
+    """
+    A wide table of facts, queried by its first, its last and by both columns
+    """
+    lines: List[str] = [f"row(k{i % keys}, v{i}, w{i % 7})." for i in range(rows)]
+
+    return Workload(f"wide_facts_{rows}", "\n".join(lines) + "\n",
+                    ("row(k7, V, W).", f"row(K, v{rows - 1}, W).",
+                     "row(K, V, w3), row(K, V2, w4)."))
+
+
+def queens(n: int) -> Workload:
+    """
+    Generate and test n-queens, a queen per row:
+    each queen is checked against the queens of the rows above it
+    """
+    lines: List[str] = [f"col(c{i})." for i in range(n)]
+    for i in range(n):
+        for j in range(n):
+            for dist in range(1, n):
+                if i == j or abs(i - j) == dist:
+                    lines.append(f"attack(c{i}, c{j}, d{dist}).")
+
+    body: List[str] = []
+    for i in range(n):
+        body.append(f"col(Q{i})")
+        body.extend(f"not(attack(Q{j}, Q{i}, d{i - j}))" for j in range(i))
+
+    args: str = ", ".join(f"Q{i}" for i in range(n))
+    lines.append(f"queens({args}) :- " + ", ".join(body) + ".")
+
+    return Workload(f"queens_{n}", "\n".join(lines) + "\n",
+                    (f"queens({args}).",))
+
+
+def permutations(n: int) -> Workload:
+    """
+    All permutations of n items, as a generated search with negation
+    """
+    lines: List[str] = [f"item(i{i})." for i in range(n)]
+    lines.append("same(X, X).")
+
+    body: List[str] = []
+    for i in range(n):
+        body.append(f"item(X{i})")
+        body.extend(f"not(same(X{j}, X{i}))" for j in range(i))
+
+    args: str = ", ".join(f"X{i}" for i in range(n))
+    lines.append(f"perm([{args}]) :- " + ", ".join(body) + ".")
+
+    # the answers are lists, which Datalog does not have
+    return Workload(f"permutations_{n}", "\n".join(lines) + "\n",
+                    ("perm(P).",), ('sld', 'machine'))
+
+
+def siblings(families: int, children: int = 4) -> Workload:
+    """
+    Families of a few children each, siblings are found through negation
+    """
+    lines: List[str] = [f"parent(f{f}, c{f}_{c})."
+                        for f in range(families)
+                        for c in range(children)]
+    # ground, so that Datalog can run it too
+    lines.extend(f"same(c{f}_{c}, c{f}_{c})."
+                 for f in range(families)
+                 for c in range(children))
+    lines.append("sibling(X, Y) :- parent(P, X), parent(P, Y), not(same(X, Y)).")
+    lines.append("only_child(X) :- parent(P, X), not(sibling(X, Y)).")
+
+    return Workload(f"siblings_{families}", "\n".join(lines) + "\n",
+                    ("sibling(X, Y).", "only_child(X).", "sibling(c0_0, Y)."))
+
+
+def parse_input(megabytes: float) -> str:
+    """
+    A program of about the given size, of facts, lists, quoted atoms and rules
+    """
+    lines: List[str] = []
+    size: int = 0
+    i: int = 0
+    while size < megabytes * 1_000_000:
+        if i % 10 == 9:
+            line: str = f"rule{i}(X, Y) :- parent(X, Z), not(parent(Z, Y)). % a comment"
+        else:
+            line = f"parent(p{i % 1000}, c{i}, [a, 'b c', {i}])."
+        lines.append(line)
+        size += len(line) + 1
+        i += 1
+
+    return "\n".join(lines) + "\n"
+
+
+def workloads(scale: float = 1.0) -> List[Workload]:
+    """
+    Returns the query workloads of the suite, scale shrinks or grows them
+    """
+    return [ancestor_chain(100),
+            ancestor_chain(max(200, int(300 * scale))),
+            wide_facts(max(1000, int(100_000 * scale))),
+            queens(6 if scale < 1 else 8),
+            permutations(5 if scale < 1 else 6),
+            siblings(max(20, int(200 * scale)))]
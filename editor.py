@@ -3,14 +3,18 @@ Module to represent the main editor
 Also the starting point of the app
 """
 
+import queue
+import threading
 import tkinter as tk
+from typing import Iterator, List, Union
 
 from src.editor.configs import FontConfig, ModeConfig
 from src.editor.text_pad import TextPad
 from src.editor.query_frame import QueryFrame
 from src.editor.menus import Menu
 
-from src.interpreter.interpreter import Interpreter
+from src.interpreter.interpreter import Answer, Interpreter
+from src.interpreter.monitor import QueryMonitor, QueryStopped
 
 
 class SimpleEditor:
@@ -18,6 +22,11 @@ class SimpleEditor:
     The main class for the app
     """
     NAME: str = 'Swish Bish Prolog'
+    POLL_MS: int = 50 # how often the output of a running query is collected
+    PAGE: int = 100 # answers found per press of Run or Next
+    BATCH: int = 500 # most answers shown per poll, so the editor stays responsive
+    # put by the worker once a page is found, it then waits for a request
+    MORE: object = object()
 
     def __init__(self,
                  mode_config: ModeConfig = ModeConfig.sh_bish_mode()) -> None:
@@ -39,6 +48,16 @@ class SimpleEditor:
         self.menu = Menu(self)
 
         self.query_frame.run_button.config(command=self.run_query)
+        self.query_frame.stop_button.config(command=self.stop_query)
+        self.query_frame.next_button.config(command=self.next_answers)
+
+        # kept between runs, so an unchanged program is not loaded again
+        self.interpreter: Interpreter = Interpreter()
+        # queries run in a worker thread, which is asked for pages of answers
+        # through one queue and sends its output through another
+        self.worker: Union[threading.Thread, None] = None
+        self.requests: queue.Queue = queue.Queue()
+        self.results: queue.Queue = queue.Queue()
 
         self.key_bindings()
 
@@ -49,6 +68,7 @@ class SimpleEditor:
         self.root.bind("<Control-s>", self.menu.menus['file'].save)
         self.root.bind("<Control-v>", self.text_pad.update_number_bar())
         self.root.bind("<Control-Return>", self.run_query)
+        self.query_frame.output.bind("<semicolon>", self.next_answers)
 
     def run(self) -> None:
         """
@@ -85,23 +105,119 @@ class SimpleEditor:
 
     def run_query(self, event=None) -> None:
         """
-        Takes the query from the query frame and runs it
+        Takes the query from the query frame and runs it in a worker thread,
+        its answers are shown a page at a time, as they are found
         """
+        if self.worker is not None and self.worker.is_alive():
+            if self.query_frame.run_button['state'] == tk.DISABLED:
+                return # one query at a time
+            self.stop_query() # the last one is waiting for a request
+            self.worker.join()
+
+        # a stop from now on is for this query, even while its program loads
+        self.interpreter.monitor.clear_stop()
+
         query: str = self.query_frame.get_query()
         src: str = self.text_pad.get_src()
 
-        intr: Interpreter = Interpreter()
+        self.query_frame.set_text("")
+        self.query_frame.set_running(True)
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.requests.put(SimpleEditor.PAGE)
+        self.worker = threading.Thread(target=self._answer,
+                                       args=(src, query, self.requests, self.results),
+                                       daemon=True)
+        self.worker.start()
+        self.root.after(SimpleEditor.POLL_MS, self._poll)
+
+    def next_answers(self, event=None) -> Union[str, None]:
+        """
+        Asks the waiting query for its next page of answers
+        """
+        if self.query_frame.next_button['state'] == tk.NORMAL:
+            self.query_frame.set_running(True)
+            self.requests.put(SimpleEditor.PAGE)
+            self.root.after(SimpleEditor.POLL_MS, self._poll)
+
+        return "break" if event is not None else None # ; is not typed
+
+    def _answer(self,
+                src: str,
+                query: str,
+                requests: queue.Queue,
+                results: queue.Queue) -> None:
+        """
+        Runs in the worker thread, the widgets are never touched here
+        A request of 0 answers ends the query
+        """
+        intr: Interpreter = self.interpreter
         try:
             intr.load_base(src)
         except ValueError as val_err:
-            self.query_frame.set_text("In knowledge base: " + str(val_err))
+            results.put("In knowledge base: " + str(val_err))
             return
 
+        found: bool = False
         try:
-            res = str(intr.answer(query))
-            self.query_frame.set_text(res)
+            answers: Iterator[Answer] = intr.answers(query)
+            wanted: int = requests.get()
+            while wanted:
+                answer: Union[Answer, None] = next(answers, None)
+                if answer is None:
+                    break
+
+                found = True
+                results.put(str(answer))
+                wanted -= 1
+                if not wanted:
+                    results.put(SimpleEditor.MORE)
+                    wanted = requests.get()
+
+            answers.close()
+            if not found:
+                results.put("false.")
         except ValueError as val_err:
-            self.query_frame.set_text("In query: " + str(val_err))
+            results.put("In query: " + str(val_err))
+        except QueryStopped as stopped:
+            results.put(str(stopped))
+
+    def _poll(self) -> None:
+        """
+        Shows the output of the worker thread, and the progress of the query
+        """
+        running: bool = self.worker.is_alive()
+        waiting: bool = False
+        chunks: List[str] = []
+        while len(chunks) < SimpleEditor.BATCH and not self.results.empty():
+            chunk: Union[str, object] = self.results.get_nowait()
+            if chunk is SimpleEditor.MORE:
+                waiting = True
+            else:
+                chunks.append(chunk)
+
+        if chunks:
+            self.query_frame.append_text(''.join(chunks))
+
+        monitor: QueryMonitor = self.interpreter.monitor
+        self.query_frame.set_status(f"{monitor.inferences} inferences, "
+                                    f"{monitor.elapsed:.2f} s")
+
+        if waiting:
+            self.query_frame.set_running(False, more=True)
+        elif running or not self.results.empty():
+            self.root.after(SimpleEditor.POLL_MS, self._poll)
+        else:
+            self.query_frame.set_running(False)
+
+    def stop_query(self, event=None) -> None:
+        """
+        Stops the running query, or ends the one waiting for a request
+        """
+        self.interpreter.monitor.stop()
+        self.requests.put(0)
+        if self.query_frame.next_button['state'] == tk.NORMAL:
+            self.query_frame.set_running(False)
 
     def quit(self) -> None:
         """
@@ -12,6 +12,8 @@ class QueryFrame(tk.Frame):
     Represents the frame where the user can input queries
     and see the output of the interpreter.
     """
+    MAX_LINES: int = 10000 # older output is dropped, so the box stays fast
+
     def __init__(self, master: tk.Frame) -> None:
         super().__init__(master)
         self.grid(row=0, column=3)
@@ -25,6 +27,17 @@ class QueryFrame(tk.Frame):
         self.run_button: tk.Button = tk.Button(self.inputframe, text='Run')
         self.run_button.grid(row=1, column=0, sticky='nsew')
 
+        self.stop_button: tk.Button = tk.Button(self.inputframe,
+                                                text='Stop',
+                                                state=tk.DISABLED)
+        self.stop_button.grid(row=2, column=0, sticky='nsew')
+
+        # asks for the next page of answers, like ; at a Prolog prompt
+        self.next_button: tk.Button = tk.Button(self.inputframe,
+                                                text='Next ;',
+                                                state=tk.DISABLED)
+        self.next_button.grid(row=3, column=0, sticky='nsew')
+
 
     def _create_input_frame(self) -> None:
         """
@@ -57,6 +70,10 @@ class QueryFrame(tk.Frame):
         self.output: tk.Text = tk.Text(self.outputframe)
         self.output.grid(row=0, column=0, sticky='nsew')
 
+        # inferences and elapsed time of the running query
+        self.status: tk.Label = tk.Label(self.outputframe, anchor='w')
+        self.status.grid(row=1, column=0, sticky='nsew')
+
     def set_text(self, text:str) -> None:
         """
         Sets the output box to have text as its content
@@ -64,6 +81,29 @@ class QueryFrame(tk.Frame):
         self.output.delete(1.0, tk.END)
         self.output.insert(tk.END, text)
 
+    def append_text(self, text: str) -> None:
+        """
+        Adds text at the end of the output box,
+        keeping only its last MAX_LINES lines
+        """
+        self.output.insert(tk.END, text)
+        self.output.delete(1.0, f"{tk.END}-{QueryFrame.MAX_LINES}l")
+        self.output.see(tk.END)
+
+    def set_status(self, text: str) -> None:
+        """
+        Sets the text of the status line under the output box
+        """
+        self.status.config(text=text)
+
+    def set_running(self, running: bool, more: bool = False) -> None:
+        """
+        Enables the buttons which apply to the state of the query:
+        running, or waiting to be asked for more answers
+        """
+        self.run_button.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.stop_button.config(state=tk.NORMAL if running or more else tk.DISABLED)
+        self.next_button.config(state=tk.NORMAL if more and not running else tk.DISABLED)
 
     def set_font(self, font_config=FontConfig('Courier', 16)) -> None:
         """
@@ -72,7 +112,8 @@ class QueryFrame(tk.Frame):
         """
         elems = [self.inputframe, self.outputframe,
                  self.output, self.input,
-                 self.run_button]
+                 self.run_button, self.stop_button,
+                 self.next_button, self.status]
 
         for elem in elems:
             elem.config(font=(font_config.family,
@@ -84,7 +125,8 @@ class QueryFrame(tk.Frame):
         for the part which is the query frames
         """
         elems = [self.inputframe, self.outputframe,
-                 self.output, self.input, self.run_button]
+                 self.output, self.input, self.run_button,
+                 self.stop_button, self.next_button, self.status]
         for elem in elems:
             elem.config(bg=mode_config.bg,
                         fg=mode_config.fg)
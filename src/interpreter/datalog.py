@@ -0,0 +1,401 @@
+"""
+Module to represent a bottom-up Datalog evaluation of a knowledge base.
+The program is materialized by semi-naive fixpoint iteration,
+stratum by stratum, so that negation as failure is stratified.
+Rule bodies and queries are evaluated as joins over hashed relations
+"""
+
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from src.interpreter.terms import Atom, Variable, PList,\
+                                  Predicate, NfPredicate,\
+                                  Conjunction, Rule, Fact, Functor
+
+from src.interpreter.knowledge_base import KnowledgeBase
+
+Row = Tuple[Atom, ...]
+Key = Functor
+Bindings = Dict[Variable, Atom]
+
+
+class Relation:
+    """
+    A set of ground rows of a predicate, in order of derivation,
+    with hash indexes on the column combinations used in lookups
+    """
+    def __init__(self, arity: int) -> None:
+        self.arity: int = arity
+        self.rows: Dict[Row, None] = {} # an ordered set
+        self._indexes: Dict[Tuple[int, ...], Dict[Row, List[Row]]] = {}
+
+    def add(self, row: Row) -> bool:
+        """
+        Adds a row to the relation
+        :Returns: whether the row was new
+        """
+        if row in self.rows:
+            return False
+
+        self.rows[row] = None
+        for cols, index in self._indexes.items():
+            index.setdefault(tuple(row[c] for c in cols), []).append(row)
+
+        return True
+
+    def lookup(self,
+               cols: Tuple[int, ...],
+               key: Row) -> Iterable[Row]:
+        """
+        Returns the rows which have the values of the key in the given columns
+        """
+        if not cols:
+            return self.rows
+
+        if len(cols) == self.arity:
+            return (key,) if key in self.rows else ()
+
+        index: Dict[Row, List[Row]] = self._indexes.get(cols)
+        if index is None:
+            index = self._indexes[cols] = {}
+            for row in self.rows:
+                index.setdefault(tuple(row[c] for c in cols), []).append(row)
+
+        return index.get(key, ())
+
+    def __contains__(self, row: Row) -> bool:
+        return row in self.rows
+
+    def __iter__(self) -> Iterator[Row]:
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class DatalogEngine:
+    """
+    Answers queries from the materialized relations of a Datalog program:
+    function-free facts and safe rules, with stratified negation
+    """
+    def __init__(self, kb: KnowledgeBase) -> None:
+        self.kb: KnowledgeBase = kb
+        self.relations: Union[Dict[Key, Relation], None] = None
+        self.version: int = -1 # the version of the knowledge base materialized
+
+    @staticmethod
+    def key(p: Predicate) -> Key:
+        """
+        Returns the name/arity of a predicate
+        """
+        return p.functor
+
+    def relation(self, key: Key) -> Relation:
+        """
+        Returns the materialized relation of a predicate
+        """
+        if self.relations is None:
+            self.materialize()
+
+        return self.relations.setdefault(key, Relation(key[1]))
+
+    def materialize(self) -> None:
+        """
+        Computes the least model of the program
+        The relations are only kept once the fixpoint is reached,
+        a stopped or failed materialization leaves nothing behind
+        """
+        version: int = self.kb.version
+        relations: Dict[Key, Relation] = {}
+        rules: List[Rule] = []
+
+        for functor in self.kb.clauses:
+            for clause in self.kb.clauses_of(functor):
+                match clause:
+                    case Rule():
+                        self._check_rule(clause)
+                        self._check_defined(clause)
+                        rules.append(clause)
+                    case Fact():
+                        relations.setdefault(self.key(clause),
+                                             Relation(len(clause)))\
+                                 .add(self._ground_row(clause))
+
+        self.relations = relations # the rules read and extend them
+        self.version = -1
+        try:
+            for stratum in self._stratify(rules):
+                self._fixpoint(stratum)
+        except BaseException:
+            self.relations = None
+            raise
+
+        self.version = version
+
+    def _fixpoint(self, rules: List[Rule]) -> None:
+        """
+        Semi-naive evaluation of the rules of a stratum:
+        after the first round, only derivations using at least one
+        row which is new since the previous round are considered
+        """
+        heads: set = {self.key(rule.head) for rule in rules}
+        for key in heads:
+            self.relations.setdefault(key, Relation(key[1]))
+
+        delta: Dict[Key, Relation] = self._apply(rules, None, heads)
+
+        while delta:
+            delta = self._apply(rules, delta, heads)
+
+    def _apply(self,
+               rules: List[Rule],
+               delta: Union[Dict[Key, Relation], None],
+               heads: set) -> Dict[Key, Relation]:
+        """
+        Applies the rules once
+        :Returns: the rows derived which were not known before
+        """
+        new: Dict[Key, Relation] = {}
+
+        for rule in rules:
+            positives: List[Predicate] = [p for p in rule.tail
+                                          if not isinstance(p, NfPredicate)]
+
+            if delta is None:
+                variants: List[List[Relation]] = [[self.relations.get(self.key(p),
+                                                                      Relation(len(p)))
+                                                   for p in positives]]
+            else:
+                # one variant per recursive literal, reading the delta there
+                variants = []
+                for i, p in enumerate(positives):
+                    if self.key(p) in heads and self.key(p) in delta:
+                        sources: List[Relation] = [self.relations.get(self.key(q),
+                                                                      Relation(len(q)))
+                                                   for q in positives]
+                        sources[i] = delta[self.key(p)]
+                        variants.append(sources)
+
+            for sources in variants:
+                for bindings in self._join(rule.tail, sources, {}):
+                    self.kb.monitor.infer()
+                    row: Row = self._row(rule.head, bindings)
+                    key: Key = self.key(rule.head)
+
+                    if row not in self.relations[key]:
+                        new.setdefault(key, Relation(key[1])).add(row)
+
+        for key, rel in new.items():
+            for row in rel:
+                self.relations[key].add(row)
+
+        return new
+
+    def _join(self,
+              literals: Iterable[Predicate],
+              sources: List[Relation],
+              bindings: Bindings) -> Iterator[Bindings]:
+        """
+        Evaluates a conjunction as a sequence of hash joins,
+        the relations of the positive literals are given by sources.
+        Negative literals are checked once all positive ones are joined
+        """
+        positives: List[Predicate] = []
+        negatives: List[Predicate] = []
+        for p in literals:
+            (negatives if isinstance(p, NfPredicate) else positives).append(p)
+
+        yield from self._join_rec(positives, sources,
+                                  self._plan(positives, sources, bindings),
+                                  0, negatives, bindings)
+
+    @staticmethod
+    def _plan(positives: List[Predicate],
+              sources: List[Relation],
+              bindings: Bindings) -> List[int]:
+        """
+        Orders the positive literals of a join: the next literal is always
+        the smallest one among those sharing a variable with the literals
+        joined so far, so that no cross products are built needlessly
+        """
+        bound: set = set(bindings)
+        remaining: List[int] = list(range(len(positives)))
+        order: List[int] = []
+
+        while remaining:
+            def cost(i: int) -> Tuple[bool, int]:
+                connected: bool = any(isinstance(arg, Atom) or arg in bound
+                                      for arg in positives[i].arguments)
+                return (not connected, len(sources[i]))
+
+            best: int = min(remaining, key=cost)
+            remaining.remove(best)
+            order.append(best)
+            bound.update(arg for arg in positives[best].arguments
+                         if isinstance(arg, Variable))
+
+        return order
+
+    def _join_rec(self,
+                  positives: List[Predicate],
+                  sources: List[Relation],
+                  order: List[int],
+                  idx: int,
+                  negatives: List[Predicate],
+                  bindings: Bindings) -> Iterator[Bindings]:
+        if idx == len(order):
+            for pred in negatives:
+                if any(True for _ in self._matches(pred,
+                                                   self.relations.get(self.key(pred),
+                                                                      Relation(len(pred))),
+                                                   bindings)):
+                    return
+            yield bindings
+            return
+
+        pred: Predicate = positives[order[idx]]
+        for extended in self._matches(pred, sources[order[idx]], bindings):
+            yield from self._join_rec(positives, sources, order, idx + 1,
+                                      negatives, extended)
+
+    def _matches(self,
+                 pred: Predicate,
+                 rel: Relation,
+                 bindings: Bindings) -> Iterator[Bindings]:
+        """
+        Probes the relation with the bound arguments of a literal
+        :Returns: the bindings extended by each matching row
+        """
+        cols: List[int] = []
+        key: List[Atom] = []
+
+        for i, arg in enumerate(pred.arguments):
+            if isinstance(arg, Atom):
+                cols.append(i)
+                key.append(arg)
+            elif arg in bindings:
+                cols.append(i)
+                key.append(bindings[arg])
+
+        for row in rel.lookup(tuple(cols), tuple(key)):
+            extended: Union[Bindings, None] = self._extend(pred, row, bindings)
+            if extended is not None:
+                yield extended
+
+    @staticmethod
+    def _extend(pred: Predicate,
+                row: Row,
+                bindings: Bindings) -> Union[Bindings, None]:
+        """
+        Binds the free variables of a literal to the values of a row
+        """
+        extended: Bindings = bindings
+        for arg, val in zip(pred.arguments, row):
+            if isinstance(arg, Variable):
+                bound: Union[Atom, None] = extended.get(arg)
+                if bound is None:
+                    if extended is bindings:
+                        extended = dict(bindings)
+                    extended[arg] = val
+                elif bound != val: # a variable repeated in the literal
+                    return None
+
+        return extended
+
+    @staticmethod
+    def _row(pred: Predicate, bindings: Bindings) -> Row:
+        return tuple(bindings[arg] if isinstance(arg, Variable) else arg
+                     for arg in pred.arguments)
+
+    @staticmethod
+    def _ground_row(fact: Fact) -> Row:
+        for arg in fact.arguments:
+            if not isinstance(arg, Atom):
+                raise ValueError("Not a Datalog program, the fact "
+                                 + str(fact) + " is not ground.")
+
+        return tuple(fact.arguments)
+
+    @staticmethod
+    def _check_rule(rule: Rule) -> None:
+        """
+        Checks that a rule is function-free and safe:
+        every variable of its head occurs in a positive literal of its body
+        """
+        bound: set = set()
+        for pred in [rule.head] + list(rule.tail):
+            for arg in pred.arguments:
+                if isinstance(arg, PList):
+                    raise ValueError("Not a Datalog program, the rule "
+                                     + str(rule) + " has a list.")
+
+                if isinstance(arg, Variable) and not isinstance(pred, NfPredicate)\
+                   and pred is not rule.head:
+                    bound.add(arg)
+
+        for arg in rule.head.arguments:
+            if isinstance(arg, Variable) and arg not in bound:
+                raise ValueError("Not a Datalog program, the rule "
+                                 + str(rule) + " is not safe.")
+
+    def _check_defined(self, rule: Rule) -> None:
+        """
+        Checks that every predicate called by a rule has clauses,
+        as the top-down engines would find when calling it
+        """
+        for pred in rule.tail:
+            self.kb.check_defined(pred)
+
+    def _stratify(self, rules: List[Rule]) -> List[List[Rule]]:
+        """
+        Splits the rules into strata, so that a predicate is
+        only negated after it has been computed completely
+        """
+        strata: Dict[Key, int] = {self.key(rule.head): 0 for rule in rules}
+
+        changed: bool = True
+        while changed:
+            changed = False
+            for rule in rules:
+                head: Key = self.key(rule.head)
+                for pred in rule.tail:
+                    need: int = strata.get(self.key(pred), 0)\
+                                + isinstance(pred, NfPredicate)
+
+                    if need > strata[head]:
+                        if need > len(strata):
+                            raise ValueError("Not a Datalog program, "
+                                             + "the negation of "
+                                             + pred.name + " is not stratified.")
+                        strata[head] = need
+                        changed = True
+
+        layers: List[List[Rule]] = [[] for _ in range(max(strata.values(), default=-1) + 1)]
+        for rule in rules:
+            layers[strata[self.key(rule.head)]].append(rule)
+
+        return layers
+
+    def solve(self, query: Conjunction) -> Iterator[Conjunction]:
+        """
+        Answers a query by lookups and joins on the materialized relations
+        :Returns: a lazy stream of substitutted goals, one per distinct answer
+        """
+        for pred in query:
+            self.kb.check_defined(pred)
+
+        if self.relations is None or self.version != self.kb.version:
+            self.materialize() # the clauses have changed since
+
+        for pred in query:
+            if any(isinstance(arg, PList) for arg in pred.arguments):
+                raise ValueError("Not a Datalog query: " + str(query))
+
+        sources: List[Relation] = [self.relation(self.key(p))
+                                   for p in query
+                                   if not isinstance(p, NfPredicate)]
+
+        for bindings in self._join(query, sources, {}):
+            self.kb.monitor.infer()
+            yield Conjunction([type(p)(p.name, PList([bindings.get(arg, arg)
+                                                      for arg in p.arguments]))
+                               for p in query])
@@ -0,0 +1,84 @@
+"""
+Module for the builtins which change the knowledge base while a query runs:
+assertz/1, asserta/1 and retract/1.
+Their argument is a clause, which is passed around as a list
+with a list per literal, [name, arguments...], so that substitutions
+and bindings apply to it like to any other argument
+"""
+
+from typing import Set, Union
+
+from src.interpreter.terms import Atom, PList, Term,\
+                                  Predicate, NfPredicate,\
+                                  Conjunction, Fact, Rule, Functor
+
+from src.interpreter.templates import ClauseTemplate
+
+# by name/arity, a predicate of the same name and another arity is the user's
+BUILTINS: Set[Functor] = {('assertz', 1), ('asserta', 1), ('retract', 1)}
+NOT: Atom = Atom('not') # marks a negative literal: [not, [name, arguments...]]
+
+
+def literal_term(p: Predicate) -> PList:
+    """
+    Returns the list standing for a literal
+    """
+    term: PList = PList((Atom(p.name),) + p.arguments.elements)
+    if isinstance(p, NfPredicate):
+        return PList([NOT, term])
+
+    return term
+
+
+def term_literal(t: Term) -> Predicate:
+    """
+    Returns the literal a list stands for
+    """
+    if not isinstance(t, PList) or not t.elements\
+       or not isinstance(t.elements[0], Atom):
+        raise ValueError("Not a literal: " + str(t))
+
+    if t.elements[0] is NOT and len(t) == 2:
+        p: Predicate = term_literal(t.elements[1])
+        return NfPredicate(p.name, p.arguments)
+
+    return Predicate(t.elements[0].name, PList(t.elements[1:]))
+
+
+def clause_term(clause: Union[Fact, Rule]) -> PList:
+    """
+    Returns the list standing for a clause, its head comes first
+    """
+    if isinstance(clause, Rule):
+        return PList([literal_term(clause.head)] + [literal_term(p) for p in clause.tail])
+
+    return PList([literal_term(clause)])
+
+
+def term_clause(t: Term) -> Union[Fact, Rule]:
+    """
+    Returns the clause a list stands for
+    """
+    if not isinstance(t, PList) or not t.elements:
+        raise ValueError("Not a clause: " + str(t))
+
+    head: Predicate = term_literal(t.elements[0])
+    if isinstance(head, NfPredicate):
+        raise ValueError("Not a clause: " + str(t))
+
+    if len(t) == 1:
+        return Fact(head.name, head.arguments)
+
+    return Rule(head, Conjunction([term_literal(e) for e in t.elements[1:]]))
+
+
+def fresh_clause(clause: Union[Fact, Rule]) -> Union[Fact, Rule]:
+    """
+    Returns a copy of the clause with fresh variables
+    """
+    head, body = ClauseTemplate(clause).instantiate()
+    if isinstance(clause, Rule):
+        return Rule(head, body)
+
+    return head
+
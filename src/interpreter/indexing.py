@@ -0,0 +1,197 @@
+"""
+Module to represent argument indexes over the clauses of a predicate
+"""
+
+from heapq import merge
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from src.interpreter.terms import Atom, Variable, Predicate,\
+                                  Fact, Rule
+
+
+class ClauseIndex:
+    """
+    Indexes the clauses of a single predicate by the atoms
+    found at each argument position of their heads.
+    Clauses are numbered in order of addition, and their numbers never change.
+    Clauses added at the front are kept by a second index, read most recent first,
+    so the candidates for a goal are produced in program order.
+    Every list only grows, and a removed clause is only marked with
+    the generation it was removed at, so nothing is ever shifted,
+    and the candidates of a call which is still running are not affected
+    """
+    def __init__(self) -> None:
+        # for each argument position: atom -> positions of clauses having it there
+        self.by_atom: List[Dict[Atom, List[int]]] = []
+        # for each argument position: positions of clauses having a variable there
+        self.unbound: List[List[int]] = []
+        self.size: int = 0 # clauses numbered so far, in front or not
+        # the positions of the clauses not added in front,
+        # None while they are all of them
+        self.positions: Union[List[int], None] = None
+        # the clauses added in front, made by the first one
+        self.front: Union[ClauseIndex, None] = None
+        # removed positions -> the generation they were removed at
+        self.removed: Dict[int, int] = {}
+        self.generation: int = 0 # counts the removals
+
+    def add(self, clause: Union[Fact, Rule]) -> int:
+        """
+        Indexes the next clause of the predicate
+        :Returns: the position of the clause
+        """
+        pos: int = self.size
+        self.size += 1
+        if self.positions is not None:
+            self.positions.append(pos)
+
+        self._put(pos, clause.head if isinstance(clause, Rule) else clause)
+        return pos
+
+    def add_ground(self, args: Tuple[Atom, ...]) -> None:
+        """
+        Indexes the next clause of the predicate, a fact with only atoms as arguments
+        """
+        pos: int = self.size
+        self.size += 1
+        if self.positions is not None:
+            self.positions.append(pos)
+
+        while len(self.by_atom) < len(args):
+            self.by_atom.append({})
+            self.unbound.append([])
+
+        for bucket, arg in zip(self.by_atom, args):
+            positions: Union[List[int], None] = bucket.get(arg)
+            if positions is None:
+                bucket[arg] = [pos]
+            else:
+                positions.append(pos)
+
+    def add_front(self, clause: Union[Fact, Rule]) -> int:
+        """
+        Indexes the next clause of the predicate, which goes before all the others
+        :Returns: the position of the clause
+        """
+        if self.front is None:
+            self.front = ClauseIndex()
+            self.front.positions = []
+            self.positions = list(range(self.size))
+
+        pos: int = self.size
+        self.size += 1
+        self.front.positions.append(pos)
+        self.front._put(pos, clause.head if isinstance(clause, Rule) else clause)
+
+        return pos
+
+    def _put(self, pos: int, head: Predicate) -> None:
+        for i, arg in enumerate(head.arguments):
+            if i == len(self.by_atom):
+                self.by_atom.append({})
+                self.unbound.append([])
+
+            match arg:
+                case Variable():
+                    self.unbound[i].append(pos)
+                case Atom():
+                    self.by_atom[i].setdefault(arg, []).append(pos)
+                case _:
+                    pass # a list never unifies with an atom
+
+    def remove(self, pos: int) -> None:
+        """
+        Removes the clause at the position,
+        calls which started before keep seeing it
+        """
+        self.removed[pos] = self.generation
+        self.generation += 1
+
+    def __len__(self) -> int:
+        """
+        Returns the number of clauses which are not removed
+        """
+        return self.size - len(self.removed)
+
+    def _buckets(self, goal: Predicate) -> Union[Tuple[List[int], List[int]], None]:
+        """
+        Returns the clauses of the most selective bound argument of the goal,
+        and those with a variable there, or None if none of the arguments is an atom
+        """
+        best: Union[List[int], None] = None
+        best_unbound: Union[List[int], None] = None
+
+        for i, arg in enumerate(goal.arguments):
+            if i == len(self.by_atom):
+                break
+
+            if isinstance(arg, Atom):
+                bucket: List[int] = self.by_atom[i].get(arg, [])
+                if best is None or len(bucket) + len(self.unbound[i])\
+                                   < len(best) + len(best_unbound):
+                    best, best_unbound = bucket, self.unbound[i]
+
+        return None if best is None else (best, best_unbound)
+
+    def _back(self, goal: Predicate) -> Iterable[int]:
+        """
+        The candidates among the clauses not added in front, in order of addition
+        """
+        buckets: Union[Tuple[List[int], List[int]], None] = self._buckets(goal)
+        if buckets is None: # a full scan
+            if self.positions is None:
+                return range(self.size)
+            return islice(self.positions, len(self.positions))
+
+        # clauses added while the candidates are consumed are not seen
+        best, best_unbound = buckets
+        if not best_unbound:
+            return islice(best, len(best))
+
+        return merge(islice(best, len(best)), islice(best_unbound, len(best_unbound)))
+
+    def _front(self, goal: Predicate) -> Iterator[int]:
+        """
+        The candidates among the clauses added in front, the most recent first
+        """
+        # a reversed list iterator starts at its current end, so it never sees appends
+        buckets: Union[Tuple[List[int], List[int]], None] = self._buckets(goal)
+        if buckets is None:
+            return reversed(self.positions)
+
+        best, best_unbound = buckets
+        if not best_unbound:
+            return reversed(best)
+
+        return merge(reversed(best), reversed(best_unbound), reverse=True)
+
+    def candidates(self, goal: Predicate) -> Iterable[int]:
+        """
+        Returns the positions of the clauses which may unify with the goal,
+        in program order
+        The most selective bound argument of the goal is used,
+        if none of the arguments is an atom, all clauses are candidates
+        """
+        found: Iterable[int] = self._back(goal)
+        if self.front is not None:
+            found = chain(self.front._front(goal), found)
+
+        if not self.removed:
+            return found
+
+        # the clauses removed from now on are still seen
+        removed: Dict[int, int] = self.removed
+        generation: int = self.generation
+        return (pos for pos in found if removed.get(pos, generation) >= generation)
+
+    def order(self) -> List[int]:
+        """
+        Returns the positions of all the clauses which are not removed, in program order
+        """
+        order: Iterable[int] = range(self.size) if self.positions is None\
+                               else self.positions
+        if self.front is not None:
+            order = chain(reversed(self.front.positions), order)
+
+        return [pos for pos in order if pos not in self.removed]
@@ -2,55 +2,201 @@
 The main class of the interpreter
 """
 
-from typing import List
+from typing import Dict, Generator, Iterator, List, NamedTuple, Union
 from src.interpreter.terms import Conjunction
 from src.interpreter.knowledge_base import KnowledgeBase
+from src.interpreter.machine import Machine
+from src.interpreter.datalog import DatalogEngine
 from src.interpreter.prolog_parser import PrologParser
-from src.interpreter.unification import Substitution, unify
+from src.interpreter.snapshot import save_snapshot, load_snapshot
+from src.interpreter.program_cache import ProgramCache
+from src.interpreter.monitor import QueryMonitor, QueryStopped,\
+                                    LimitReached, Limits
+from src.interpreter.profiler import Profiler
+from src.interpreter.unification import Substitution, SubstitutionApplicator, unify
+
+class Answer(NamedTuple):
+    """
+    An answer to a query, the values of its variables as text
+    """
+    bindings: Dict[str, str]
+
+    def __str__(self) -> str:
+        res: str = ', '.join([f"{var} = {val}"
+                              for var, val
+                              in self.bindings.items()])
+        return "true.\n" + res + "\n"
+
 
 class Interpreter:
     """
     The main class of the interpreter
     """
-    def __init__(self, kb: KnowledgeBase = KnowledgeBase()) -> None:
-        self.kb: KnowledgeBase = kb
+    # sld - recursive SLD resolution of the knowledge base
+    # machine - the iterative machine, for very deep proofs
+    # datalog - bottom-up evaluation, for function-free programs
+    ENGINES: tuple = ('sld', 'machine', 'datalog')
+
+    def __init__(self,
+                 kb: Union[KnowledgeBase, None] = None,
+                 engine: str = 'sld') -> None:
+        if engine not in Interpreter.ENGINES:
+            raise ValueError("Unknown engine: " + engine)
+
+        # a knowledge base of its own, asserted clauses must not leak between interpreters
+        self.kb: KnowledgeBase = kb if kb is not None else KnowledgeBase()
+        self.engine: str = engine
+        self._datalog: DatalogEngine = None # materialized on the first query
+        self._programs: ProgramCache = ProgramCache()
+        # shared by all the knowledge bases loaded, so it can be held on to
+        self.monitor: QueryMonitor = QueryMonitor()
+        self.profiler: Union[Profiler, None] = None # while profiling
 
     def load_base(self, content: str) -> None:
         """
         Loads a knowledge base from a string
+        Loading the same program again is free, and after an edit
+        only the clauses which have changed are parsed again
+        """
+        kb: KnowledgeBase = self._programs.load(content)
+        if kb is not self.kb:
+            self.kb = kb
+            self._datalog = None
+
+    def save_snapshot(self, path: str) -> None:
+        """
+        Compiles the knowledge base into a snapshot file
+        """
+        save_snapshot(self.kb, path)
+
+    def load_snapshot(self, path: str) -> None:
+        """
+        Loads a knowledge base from a snapshot file, without parsing it again
+        """
+        self.kb = load_snapshot(path)
+        self._datalog = None
+
+    def start_profiling(self) -> None:
+        """
+        Profiles the predicates called by the next queries,
+        the SLD engine is the one profiled
+        """
+        self.profiler = Profiler()
+
+    def stop_profiling(self) -> Dict[str, object]:
+        """
+        Stops profiling
+        :Returns: the report of the queries profiled
+        """
+        report: Dict[str, object] = self.profile()
+        self.profiler = None
+        self.kb.profiler = None
+
+        return report
+
+    def profile(self) -> Dict[str, object]:
+        """
+        Returns the report of the queries profiled so far:
+        per predicate name/arity, its calls, clauses tried, unifications,
+        failed calls, cumulative and self time, and the inferences per second
+        """
+        if self.profiler is None:
+            raise ValueError("Not profiling.")
+
+        return self.profiler.report()
+
+    def dump_profile(self, path: str) -> None:
+        """
+        Writes the report of the queries profiled so far as JSON
+        """
+        if self.profiler is None:
+            raise ValueError("Not profiling.")
+
+        self.profiler.dump(path)
+
+    def solve(self, query: Conjunction) -> Iterator[Conjunction]:
         """
-        prs: PrologParser = PrologParser(content)
-        self.kb: KnowledgeBase = prs.parse_program()
+        Answers a parsed query with the selected engine
+        :Returns: a lazy stream of substitutted goals
+        """
+        self.kb.monitor = self.monitor
+        self.kb.profiler = self.profiler
+
+        if self.engine == 'machine':
+            return Machine(self.kb).solve(query)
+
+        if self.engine == 'datalog':
+            if self._datalog is None:
+                self._datalog = DatalogEngine(self.kb)
+            return self._datalog.solve(query)
 
-    def answer(self, query: str) -> str:
+        return self.kb.answer_query(query)
+
+    def answers(self, query: str, limits: Limits = Limits()) -> Iterator[Answer]:
         """
         Queries the knowledge base
+        :Returns: a lazy stream of answers, one per solution
+        :Raises: LimitReached once the query reaches one of its limits,
+                 after the answers found until then,
+                 the search stops as soon as the answers asked for are found
         """
+        if limits.answers is not None and limits.answers < 0:
+            raise ValueError("The answer limit cannot be negative.")
+
         prs: PrologParser = PrologParser(query)
         query: Conjunction = prs.parse_goal()
 
-        answer: str = ''
+        self.monitor.start(limits)
+        found: int = 0
+        # the engines solve queries in generators, closed when the answers stop
+        solutions: Union[Generator[Conjunction, None, None], None] = None
+        try:
+            if limits.answers == 0:
+                raise LimitReached("Limit reached: 0 answers.")
 
-        solutions: List[Conjunction] = self.kb.answer_query(query)
-
-        if solutions:
+            # solutions are pulled from the knowledge base one at a time
+            solutions = self.solve(query)
             for solution in solutions:
-                answer += "true.\n"
-
-                var_bindings: Substitution = query.variables
+                var_bindings: Dict[str, str] = {name: str(var) for name, var
+                                                in query.variables.items()}
 
                 subs: Substitution = unify(query, solution)
+                sa: SubstitutionApplicator = SubstitutionApplicator(subs)
 
                 for var, val in subs.items():
                     if var.name in var_bindings:
-                        var_bindings[var.name] = str(val)
+                        var_bindings[var.name] = str(sa.sub_term(val))
 
+                yield Answer(var_bindings)
+                found += 1
+                if found == limits.answers: # the next one is not searched for
+                    raise LimitReached(f"Limit reached: {found} answers.")
+        except QueryStopped:
+            self.kb.tables = {} # the tables being filled are incomplete
+            raise
+        except RecursionError as rec_err:
+            self.kb.tables = {}
+            raise LimitReached("Limit reached: the depth of the Python stack.")\
+                  from rec_err
+        finally:
+            if solutions is not None:
+                solutions.close() # the engine leaves the search it is in
+            self.monitor.finish()
+            if self.profiler is not None:
+                self.profiler.add_query(self.monitor.inferences, self.monitor.elapsed)
 
-                res: str = ', '.join([f"{var} = {val}"
-                                      for var, val
-                                      in var_bindings.items()])
-                answer += res + "\n"
-        else:
-            answer = "false."
+    def answer(self, query: str, limits: Limits = Limits()) -> str:
+        """
+        Queries the knowledge base
+        The answers found are given even if a limit is reached,
+        followed by the limit
+        """
+        answers: List[str] = []
+        try:
+            for answer in self.answers(query, limits):
+                answers.append(str(answer))
+        except LimitReached as limit:
+            answers.append(str(limit) + "\n")
+            return ''.join(answers)
 
-        return answer
+        return ''.join(answers) if answers else "false."
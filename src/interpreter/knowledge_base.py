@@ -2,12 +2,22 @@
 Module to represent the knowledge base
 """
 
-from typing import List, Union
-
-from src.interpreter.terms import Fact, NfPredicate, Rule,\
-                                  Predicate, Conjunction
-
-from src.interpreter.unification import unify,\
+import csv
+import sys
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple, Union
+
+from src.interpreter.terms import Fact, NfPredicate, Rule, Functor,\
+                                  Predicate, Conjunction, Atom, PList, Term
+
+from src.interpreter.indexing import ClauseIndex
+from src.interpreter.templates import ClauseTemplate, Frame
+from src.interpreter.planner import ConjunctionPlanner, Bindings
+from src.interpreter.tabling import AnswerTable, Variant, variant_key
+from src.interpreter.monitor import QueryMonitor
+from src.interpreter.profiler import Profiler, PredicateStats
+from src.interpreter.dynamic import BUILTINS, clause_term, term_clause,\
+                                    fresh_clause
+from src.interpreter.unification import unify, unify_into,\
                                         Substitution,\
                                         SubstitutionApplicator
 
@@ -18,7 +28,27 @@ class KnowledgeBase:
     """
 
     def __init__(self) -> None:
-        self.clauses: dict[str, List[Union[Fact, Rule]]] = {}
+        # all keyed by the name/arity of the predicates,
+        # the clauses in order of addition, the index gives their program order
+        self.clauses: dict[Functor, List[Union[Fact, Rule]]] = {}
+        self.indexes: dict[Functor, ClauseIndex] = {}
+        # parallel to the clauses, each clause with its variables numbered
+        self.templates: dict[Functor, List[ClauseTemplate]] = {}
+        # whether all clauses of a predicate are facts with atoms as arguments
+        self.fact_tables: dict[Functor, bool] = {}
+
+        self.planner: ConjunctionPlanner = ConjunctionPlanner(self)
+        self.plan_joins: bool = True # evaluate runs of fact goals by hash joins
+
+        self.tabled: set[Functor] = set() # name/arity of the tabled predicates
+        self.tables: dict[Variant, AnswerTable] = {}
+        self._iteration: int = 0 # counts the fixpoint iterations of tabled calls
+        self._leading: bool = False # whether a tabled call is being completed
+        self._changed: bool = False # whether an iteration found new answers
+
+        self.version: int = 0 # counts the changes, for the caches built on the clauses
+        self.monitor: QueryMonitor = QueryMonitor() # counts the inferences of the queries
+        self.profiler: Union[Profiler, None] = None # times the calls, when profiling
 
 
     def add_clause(self,
@@ -26,109 +56,457 @@ class KnowledgeBase:
         """
         Adds a clause to the knowledge base
         """
-        if clause.name not in self.clauses:
-            self.clauses[clause.name] = []
+        functor: Functor = clause.functor
+        self._declare(functor)
+
+        self.clauses[functor].append(clause)
+        self.indexes[functor].add(clause)
+        self.templates[functor].append(ClauseTemplate(clause))
+
+        self.fact_tables[functor] = self.fact_tables.get(functor, True)\
+                                    and isinstance(clause, Predicate)\
+                                    and all(isinstance(arg, Atom)
+                                            for arg in clause.arguments)
+
+        self._changed_clauses()
+
+    def _declare(self, functor: Functor) -> None:
+        """
+        Makes the empty tables of a predicate, if it has none yet
+        """
+        if functor not in self.clauses:
+            self.clauses[functor] = []
+            self.indexes[functor] = ClauseIndex()
+            self.templates[functor] = []
+
+    def add_facts(self,
+                  name: str,
+                  rows: Iterable[Iterable[object]]) -> int:
+        """
+        Adds a fact of the predicate for each row of values, in a single pass
+        and without going through the parser, every value becomes an atom
+        :Returns: the number of facts added
+        """
+        name = sys.intern(name)
+        # the atoms of this load, a plain dict is faster than the weak symbol table
+        symbols: Dict[str, Atom] = {}
+        added: int = 0
+        arity: int = -1 # of the tables at hand, rows of other lengths switch them
+
+        for row in rows:
+            if not row:
+                continue # a blank line
+
+            args: PList = PList([symbols.get(value)
+                                 or symbols.setdefault(value, Atom(str(value)))
+                                 for value in row])
+            if len(args) != arity:
+                arity = len(args)
+                functor: Functor = (name, arity)
+                self._declare(functor)
+                clauses: List[Union[Fact, Rule]] = self.clauses[functor]
+                index: ClauseIndex = self.indexes[functor]
+                templates: List[ClauseTemplate] = self.templates[functor]
+                # ground facts keep a fact table a fact table
+                self.fact_tables[functor] = self.fact_tables.get(functor, True)
+
+            fact: Fact = Fact(name, args)
+            clauses.append(fact)
+            index.add_ground(args.elements)
+            templates.append(ClauseTemplate.ground(fact))
+            added += 1
+
+        if added:
+            self._changed_clauses()
+
+        return added
+
+    def load_csv(self,
+                 name: str,
+                 source: Union[str, TextIO],
+                 delimiter: str = ",",
+                 header: bool = False) -> int:
+        """
+        Adds a fact of the predicate for each record of a CSV file,
+        use delimiter="\\t" for TSV files
+        :Returns: the number of facts added
+        """
+        if isinstance(source, str):
+            with open(source, newline="", encoding="utf-8") as file:
+                return self.load_csv(name, file, delimiter, header)
+
+        rows: Iterator[List[str]] = csv.reader(source,
+                                               delimiter=delimiter,
+                                               skipinitialspace=True)
+        if header:
+            next(rows, None)
+
+        return self.add_facts(name, rows)
+
+    def add_statement(self,
+                      statement: Union[Fact, Rule,
+                                       Tuple[str, List[Tuple[str, int]]]]) -> None:
+        """
+        Adds a clause, or applies a directive, of a parsed program
+        """
+        match statement:
+            case ("table", indicators):
+                for name, arity in indicators:
+                    self.table(name, arity)
+            case (name, _):
+                raise ValueError(f"Unknown directive: {name}.")
+            case clause:
+                self.add_clause(clause)
+
+    def _changed_clauses(self) -> None:
+        self.version += 1
+        if self.tables:
+            self.tables = {} # the stored answers may be wrong now
+
+    def assertz(self, clause: Union[Fact, Rule]) -> None:
+        """
+        Adds a clause after the other clauses of its predicate
+        """
+        self.add_clause(clause)
+
+    def asserta(self, clause: Union[Fact, Rule]) -> None:
+        """
+        Adds a clause before the other clauses of its predicate
+        """
+        functor: Functor = clause.functor
+        if functor not in self.clauses:
+            self.add_clause(clause)
+            return
+
+        # the clauses are only appended, the index keeps them in program order
+        self.clauses[functor].append(clause)
+        self.templates[functor].append(ClauseTemplate(clause))
+        self.indexes[functor].add_front(clause)
+
+        self.fact_tables[functor] = self.fact_tables[functor]\
+                                    and isinstance(clause, Predicate)\
+                                    and all(isinstance(arg, Atom)
+                                            for arg in clause.arguments)
+        self._changed_clauses()
+
+    def retract(self, clause: Union[Fact, Rule]) -> Union[Fact, Rule, None]:
+        """
+        Removes the first clause of the predicate which unifies with the given one,
+        a fact only unifies with facts
+        :Returns: the removed clause with fresh variables,
+                  or None if no clause unifies
+        """
+        head: Predicate = clause.head if isinstance(clause, Rule) else clause
+        functor: Functor = head.functor
+        if functor not in self.clauses:
+            return None
+
+        target: PList = clause_term(clause)
+        clauses: List[Union[Fact, Rule]] = self.clauses[functor]
+        templates: List[ClauseTemplate] = self.templates[functor]
+
+        for pos in self.indexes[functor].candidates(head):
+            instance_head, instance_body = templates[pos].instantiate()
+            instance: Union[Fact, Rule] = Rule(instance_head, instance_body)\
+                                          if isinstance(clauses[pos], Rule)\
+                                          else instance_head
+
+            if unify(target, clause_term(instance)) is None:
+                continue
+
+            # the calls which are still running keep seeing the clause
+            index: ClauseIndex = self.indexes[functor]
+            index.remove(pos)
+            if len(index.removed) > index.size // 2:
+                self._compact(functor)
+            self._changed_clauses()
+
+            return instance
+
+        return None
+
+    def _compact(self, functor: Functor) -> None:
+        """
+        Drops the removed clauses of a predicate,
+        new lists are made, so the calls which are still running keep the old ones
+        """
+        order: List[int] = self.indexes[functor].order()
+        clauses: List[Union[Fact, Rule]] = self.clauses[functor]
+        templates: List[ClauseTemplate] = self.templates[functor]
+
+        index: ClauseIndex = ClauseIndex()
+        for pos in order:
+            index.add(clauses[pos])
+
+        self.clauses[functor] = [clauses[pos] for pos in order]
+        self.templates[functor] = [templates[pos] for pos in order]
+        self.indexes[functor] = index
+
+    def clauses_of(self, functor: Functor) -> List[Union[Fact, Rule]]:
+        """
+        Returns the clauses of a predicate in program order, without the removed ones
+        """
+        if functor not in self.clauses:
+            return []
 
-        self.clauses[clause.name].append(clause)
+        clauses: List[Union[Fact, Rule]] = self.clauses[functor]
+        index: ClauseIndex = self.indexes[functor]
+        if index.front is None and not index.removed:
+            return clauses
+
+        return [clauses[pos] for pos in index.order()]
+
+    def table(self, name: str, arity: int) -> None:
+        """
+        Enables tabled evaluation for the predicate name/arity
+        """
+        self.tabled.add((name, arity))
+        self.tables = {}
 
     def __eq__(self, o: object) -> bool:
         if isinstance(o, KnowledgeBase):
-            return self.clauses == o.clauses
+            return self.clauses.keys() == o.clauses.keys()\
+                   and all(self.clauses_of(functor) == o.clauses_of(functor)
+                           for functor in self.clauses)
         return False
 
 
     def __str__(self) -> str:
-        return '\n'.join([str(clause) for clause in self.clauses])
+        return '\n'.join([f"{name}/{arity}" for name, arity in self.clauses])
 
     def __repr__(self) -> str:
         return "KnowledgeBase(" + str(self) + ")"
 
-    def query_single(self, goal: Predicate) -> List[Predicate]:
+    def query_single(self, goal: Predicate, depth: int = 0) -> Iterator[Predicate]:
         """
          Queries the knowledge base
-        :Returns: substitued goal heads
+         depth is the number of rules resolved to reach the goal
+        :Returns: a lazy stream of substitued goal heads
         """
+        self.monitor.infer()
 
-        preds: List[Predicate] = []
+        if self.profiler is not None:
+            return self.profiler.call(goal, self._query_single(goal, depth))
 
-        if goal.name not in self.clauses:
-            raise ValueError("No such predicate: "
-                              + str(goal.name)
-                              + "\\"
-                              + str(len(goal)))
+        return self._query_single(goal, depth)
 
-        for clause in self.clauses[goal.name]:
+    def _query_single(self, goal: Predicate, depth: int) -> Iterator[Predicate]:
+        if goal.functor in BUILTINS:
+            return self._builtin(goal)
 
-            match clause:
-                case Fact():
-                    unif: Substitution = unify(clause, goal)
+        functor: Functor = goal.functor
+        if functor in self.tabled:
+            return self._tabled_call(goal, depth)
 
-                    if unif is not None:
-                        preds.append(SubstitutionApplicator(unif).sub_predicate(goal))
+        return self._resolve_clauses(goal, functor, depth)
 
-                case Rule():
-                    unif_head: Substitution = unify(clause.head, goal)
+    def check_defined(self, goal: Predicate) -> None:
+        """
+        Checks that the predicate of a goal has clauses, as all engines require
+        :Raises: ValueError if it has none
+        """
+        if goal.functor not in self.clauses:
+            raise ValueError("No such predicate: "
+                              + str(goal.name)
+                              + "\\"
+                              + str(len(goal)))
 
-                    if unif_head is not None:
-                        sa: SubstitutionApplicator = SubstitutionApplicator(unif_head)
+    def _builtin(self, goal: Predicate) -> Iterator[Predicate]:
+        """
+        Runs a builtin which changes the clauses, when its answer is asked for
+        """
+        clause: Union[Fact, Rule] = term_clause(goal.arguments.elements[0])
+
+        match goal.name:
+            case "assertz":
+                self.assertz(fresh_clause(clause))
+                yield goal
+            case "asserta":
+                self.asserta(fresh_clause(clause))
+                yield goal
+            case _: # retract
+                removed: Union[Fact, Rule, None] = self.retract(clause)
+                if removed is None:
+                    return
+
+                unif: Substitution = unify(goal.arguments.elements[0],
+                                           clause_term(removed))
+                if unif is not None:
+                    yield SubstitutionApplicator(unif).sub_predicate(goal)
+
+    def tabled_answers(self, goal: Predicate, depth: int = 0) -> List[ClauseTemplate]:
+        """
+        Evaluates a call to a tabled predicate, reached at the given depth
+        :Returns: the answers in the table of the call
+        """
+        return self._fill_table(goal, depth).answers
 
-                        subbed_head: Predicate = sa.sub_predicate(clause.head)
-                        subbed_tail: Conjunction = sa.sub_conjunction(clause.tail)
+    def _tabled_call(self, goal: Predicate, depth: int) -> Iterator[Predicate]:
+        table: AnswerTable = self._fill_table(goal, depth)
 
-                        for conj in self.answer_query_rec(subbed_tail, 0, unif_head):
-                            subs: Substitution = unify(subbed_tail, conj)
-                            if subs is not None:
-                                preds.append(SubstitutionApplicator(subs).sub_predicate(subbed_head))
-                case _:
-                    raise ValueError("Unknown clause type: " + str(clause))
+        i: int = 0
+        while i < len(table): # answers may still be added while consuming them
+            yield table.answers[i].instantiate()[0]
+            i += 1
 
-        return preds
+    def _fill_table(self, goal: Predicate, depth: int) -> AnswerTable:
+        """
+        Finds the table of a tabled call, evaluating the call if needed
+        The first call which is not complete leads the evaluation:
+        all calls made while it is evaluated are iterated until
+        none of their tables grows anymore, and then are complete.
+        A recursive variant call consumes the answers found so far
+        """
+        key: Variant = variant_key(goal)
+        table: AnswerTable = self.tables.get(key)
+
+        if table is None:
+            table = self.tables[key] = AnswerTable()
+
+        if table.complete or table.evaluating:
+            return table
+
+        if self._leading:
+            if table.evaluated_in != self._iteration:
+                self._evaluate(goal, table, depth)
+            return table
+
+        self._leading = True
+        first: int = self._iteration + 1
+        try:
+            while True:
+                self._iteration += 1
+                self._changed = False
+                self._evaluate(goal, table, depth)
+                if not self._changed:
+                    break
+
+            for other in self.tables.values():
+                if other.evaluated_in is not None and other.evaluated_in >= first:
+                    other.complete = True
+        finally:
+            self._leading = False
+
+        return table
+
+    def _evaluate(self, goal: Predicate, table: AnswerTable, depth: int) -> None:
+        """
+        Resolves a tabled call against its clauses once,
+        adding the answers to its table
+        """
+        table.evaluating = True
+        table.evaluated_in = self._iteration
+        try:
+            for answer in self._resolve_clauses(goal, goal.functor, depth):
+                if table.add(answer):
+                    self._changed = True
+        finally:
+            table.evaluating = False
+
+    def _resolve_clauses(self,
+                         goal: Predicate,
+                         functor: Functor,
+                         depth: int) -> Iterator[Predicate]:
+        """
+        Resolves a goal against the clauses of its predicate,
+        the goals of a rule body are one level deeper than the goal
+        :Returns: a lazy stream of substitued goal heads
+        """
+        self.check_defined(goal)
+        templates: List[ClauseTemplate] = self.templates[functor]
+
+        args: Tuple[Term, ...] = goal.arguments.elements
+        stats: Union[PredicateStats, None] = self.profiler.predicate(goal)\
+                                             if self.profiler is not None else None
+
+        # only the clauses whose heads agree with the bound arguments are tried
+        for pos in self.indexes[functor].candidates(goal):
+            template: ClauseTemplate = templates[pos]
+            # standardize the clause apart, every call gets its own frame
+            frame: Frame = template.frame()
+            unif: Substitution = {}
+            matched: bool = template.match(args, frame, unif)
+            if stats is not None:
+                stats.attempts += 1
+                stats.unifications += matched
+
+            if not matched:
+                continue
+
+            sa: SubstitutionApplicator = SubstitutionApplicator(unif)
+            # the head is the goal itself, once unified
+            subbed_head: Predicate = sa.sub_predicate(goal)
+
+            if not template.body: # a fact
+                yield subbed_head
+                continue
+
+            subbed_tail: Conjunction = sa.sub_conjunction(template.build_body(frame))
+
+            self.monitor.reach(depth + 1)
+            for conj in self.answer_query_rec(subbed_tail, 0, {}, depth + 1):
+                subs: Substitution = unify(subbed_tail, conj)
+                if subs is not None:
+                    yield SubstitutionApplicator(subs).sub_predicate(subbed_head)
 
     def answer_query_rec(self,
                          goal: Conjunction,
                          idx: int,
-                         sub: Substitution) -> List[Conjunction]:
+                         sub: Substitution,
+                         depth: int = 0) -> Iterator[Conjunction]:
         """
-        Answers a query
-        :Returns: a list of substitutioned goals
+        Answers a query, whose goals are reached at the given depth
+        :Returns: a lazy stream of substitutioned goals
         """
         if idx == len(goal):
-            return [SubstitutionApplicator(sub).sub_conjunction(goal)] # we found a solution
-
+            yield SubstitutionApplicator(sub).sub_conjunction(goal) # we found a solution
+            return
 
-        sols: List[Conjunction] = []
         current_pred: Predicate = goal[idx]
 
         subs_applicator: SubstitutionApplicator = SubstitutionApplicator(sub)
 
-        preds: List[Predicate] = self.query_single(subs_applicator.sub_predicate(current_pred))
+        run: int = self.planner.fact_run(goal, idx)\
+                   if self.plan_joins and idx + 1 < len(goal) else 0
+        # the next goals only need fact tables, join them all at once
+        joined: Union[Iterator[Bindings], None] =\
+            self.planner.join([subs_applicator.sub_predicate(p)
+                               for p in goal.predicates[idx:idx + run]])\
+            if run > 1 else None
+        if joined is not None:
+            for bindings in joined:
+                sa: SubstitutionApplicator = SubstitutionApplicator(bindings)
+                comp_sub: Substitution = {var: sa.sub_term(term)
+                                          for var, term in sub.items()}
+                comp_sub.update(bindings)
+
+                yield from self.answer_query_rec(goal, idx + run, comp_sub, depth)
+            return
+
+        preds: Iterator[Predicate] = self.query_single(subs_applicator.sub_predicate(current_pred),
+                                                         depth)
+
+        if isinstance(current_pred, NfPredicate):
+            # negation as failure only needs to know whether a single proof exists
+            if next(preds, None) is None:
+                yield from self.answer_query_rec(goal, idx + 1, sub, depth)
+            return
 
         for pred in preds:
             # for each matchings of the current predicate(in the current substitution)
             # we try to match the next predicate
 
-            unif: Substitution = unify(pred, current_pred)
-
-            # compose the current substitution with the new one
-            comp_sub: Substitution = subs_applicator.compose(unif, sub)
-
-            if comp_sub is not None:
-                # extend the solutions with the ones given the new substitution
-                sols.extend(self.answer_query_rec(goal, idx + 1, comp_sub))
+            # extend a copy of the current substitution with the new bindings
+            comp_sub: Substitution = sub.copy()
 
-        if not preds and isinstance(current_pred, NfPredicate):
-            sols.extend(self.answer_query_rec(goal, idx + 1, sub))
+            if unify_into(current_pred, pred, comp_sub):
+                # continue with the solutions given the new substitution
+                yield from self.answer_query_rec(goal, idx + 1, comp_sub, depth)
 
-        elif preds and isinstance(current_pred, NfPredicate):
-            return []
-
-        return sols
-
-    def answer_query(self, goal: Conjunction) -> List[Conjunction]:
+    def answer_query(self, goal: Conjunction) -> Iterator[Conjunction]:
         """
         Answers a query
-        :Returns: a list of substitutted goals
+        :Returns: a lazy stream of substitutted goals,
+                  solutions are produced one at a time, on demand
         """
-        sol = self.answer_query_rec(goal, 0, {})
-
-        return sol
+        return self.answer_query_rec(goal, 0, {})
@@ -0,0 +1,330 @@
+"""
+Module to represent an iterative resolution machine.
+Unlike the recursive SLD resolution of the knowledge base,
+it keeps its own goal stack, trail and choice point stack,
+so the depth of a proof is not bounded by the Python stack.
+Variables are bound destructively, through their binding slot,
+instead of building and composing substitutions
+"""
+
+from typing import Iterator, List, NamedTuple, Tuple, Union
+
+from src.interpreter.terms import Variable, PList, Term,\
+                                  Predicate, NfPredicate,\
+                                  Conjunction, Fact, Rule, Functor
+
+from src.interpreter.knowledge_base import KnowledgeBase
+from src.interpreter.monitor import QueryMonitor
+from src.interpreter.templates import ClauseTemplate, Frame,\
+                                      Slot, TemplateList
+from src.interpreter.dynamic import BUILTINS, clause_term, term_clause,\
+                                    fresh_clause
+
+# The goals still to be proven, as a linked list: (goal, depth, rest of the goals)
+# the depth of a goal is the number of rules resolved to reach it
+# Continuations are shared between choice points, so they are never copied
+Goals = Union[Tuple[Predicate, int, "Goals"], None]
+
+
+class ChoicePoint(NamedTuple):
+    """
+    A goal with the clauses which are still to be tried for it:
+    the next one, and the ones after it
+    """
+    goal: Predicate
+    depth: int
+    rest: Goals
+    clause: ClauseTemplate
+    alternatives: Iterator[ClauseTemplate]
+    trail_mark: int
+
+
+class Machine:
+    """
+    Proves queries against a knowledge base without recursion
+    """
+    def __init__(self, kb: KnowledgeBase) -> None:
+        self.kb: KnowledgeBase = kb
+        self.trail: List[Variable] = [] # bound variables in the order of binding
+
+    def solve(self, query: Conjunction) -> Iterator[Conjunction]:
+        """
+        Answers a query
+        :Returns: a lazy stream of substitutted goals
+        """
+        goals: Goals = None
+        for pred in reversed(query.predicates):
+            goals = (pred, 0, goals)
+
+        try:
+            for _ in self._run(goals):
+                yield Conjunction([self.resolve_predicate(p) for p in query])
+        finally:
+            self._undo(0) # leave the variables of the query free
+
+    def _run(self, goals: Goals) -> Iterator[None]:
+        """
+        The main loop of the machine,
+        yields each time all of the goals are proven,
+        with the bindings of the solution in place
+        """
+        choices: List[ChoicePoint] = []
+        monitor: QueryMonitor = self.kb.monitor
+
+        while True:
+            if goals is False:
+                return
+
+            if goals is None:
+                yield # a solution, the bindings are live until we resume
+                goals = self._backtrack(choices)
+                continue
+
+            goal, depth, rest = goals
+            monitor.infer()
+
+            if goal.functor in BUILTINS:
+                goals = rest if self._builtin(goal) else self._backtrack(choices)
+                continue
+
+            if isinstance(goal, NfPredicate):
+                mark: int = len(self.trail)
+                proven: bool = self._provable(goal, depth)
+                self._undo(mark)
+
+                goals = self._backtrack(choices) if proven else rest
+                continue
+
+            candidates: Iterator[ClauseTemplate] = self._candidates(goal, depth)
+            first: Union[ClauseTemplate, None] = next(candidates, None)
+            resolved: Union[Goals, bool] = False
+            if first is not None:
+                resolved = self._resolve(ChoicePoint(goal, depth, rest,
+                                                     first, candidates,
+                                                     len(self.trail)),
+                                         choices)
+
+            goals = self._backtrack(choices) if resolved is False else resolved
+
+    def _provable(self, goal: Predicate, depth: int) -> bool:
+        """
+        Checks whether a goal has at least one proof, found at the given depth
+        """
+        run: Iterator[None] = self._run((Predicate(goal.name, goal.arguments), depth, None))
+        proven: bool = next(run, False) is None
+        run.close()
+
+        return proven
+
+    def _builtin(self, goal: Predicate) -> bool:
+        """
+        Runs a builtin which changes the clauses, it has no alternatives
+        :Returns: whether it succeeded
+        """
+        clause: Union[Fact, Rule] = term_clause(self.resolve_term(goal.arguments.elements[0]))
+
+        match goal.name:
+            case "assertz":
+                self.kb.assertz(fresh_clause(clause))
+            case "asserta":
+                self.kb.asserta(fresh_clause(clause))
+            case _: # retract
+                removed: Union[Fact, Rule, None] = self.kb.retract(clause)
+                return removed is not None\
+                       and self._unify(goal.arguments.elements[0], clause_term(removed))
+
+        return True
+
+    def _candidates(self, goal: Predicate, depth: int) -> Iterator[ClauseTemplate]:
+        """
+        Returns the clauses which may match the goal, reached at the given depth
+        A tabled goal is matched against the answers in its table instead
+        """
+        functor: Functor = goal.functor
+        if functor in self.kb.tabled:
+            return iter(self.kb.tabled_answers(self.resolve_predicate(goal), depth))
+
+        self.kb.check_defined(goal)
+
+        deref: Predicate = Predicate(goal.name,
+                                     PList([self.deref(arg) for arg in goal.arguments]))
+
+        return map(self.kb.templates[functor].__getitem__,
+                   self.kb.indexes[functor].candidates(deref))
+
+    def _resolve(self,
+                 choice: ChoicePoint,
+                 choices: List[ChoicePoint]) -> Union[Goals, bool]:
+        """
+        Tries the remaining clauses of a choice point, until one matches the goal
+        The choice point is only kept if a clause is left after that one
+        :Returns: the new goals, or False if no clause matches
+        """
+        template: Union[ClauseTemplate, None] = choice.clause
+        while template is not None:
+            following: Union[ClauseTemplate, None] = next(choice.alternatives, None)
+            frame: Frame = template.frame()
+
+            # the clauses are those of the goal's name/arity, no need to compare them
+            if self._unify_head(template.head.arguments,
+                                choice.goal.arguments,
+                                frame):
+                if following is not None: # come back here for the other clauses
+                    choices.append(choice._replace(clause=following))
+
+                goals: Goals = choice.rest
+                if template.body:
+                    depth: int = choice.depth + 1
+                    self.kb.monitor.reach(depth)
+                    for pred in reversed(template.body):
+                        goals = (template.build_predicate(pred, frame), depth, goals)
+
+                return goals
+
+            self._undo(choice.trail_mark)
+            template = following
+
+        return False
+
+    def _backtrack(self, choices: List[ChoicePoint]) -> Union[Goals, bool]:
+        """
+        Resumes the most recent choice point which still has alternatives
+        :Returns: the new goals, or False if there are none
+        """
+        while choices:
+            choice: ChoicePoint = choices.pop()
+            self._undo(choice.trail_mark)
+
+            goals: Union[Goals, bool] = self._resolve(choice, choices)
+            if goals is not False:
+                return goals
+
+        return False
+
+    def deref(self, t: Term) -> Term:
+        """
+        Follows the bindings of a variable
+        """
+        while isinstance(t, Variable) and t.binding is not None:
+            t = t.binding
+
+        return t
+
+    def resolve_term(self, t: Term) -> Term:
+        """
+        Applies the current bindings to a term
+        """
+        t = self.deref(t)
+
+        if isinstance(t, PList) and not t.ground:
+            return PList([self.resolve_term(e) for e in t.elements])
+
+        return t
+
+    def resolve_predicate(self, p: Predicate) -> Predicate:
+        """
+        Applies the current bindings to a predicate
+        """
+        return type(p)(p.name, self.resolve_term(p.arguments))
+
+    def _bind(self, var: Variable, t: Term) -> None:
+        var.binding = t
+        self.trail.append(var)
+
+    def _undo(self, mark: int) -> None:
+        """
+        Undoes the bindings made after the trail had the given length
+        """
+        trail: List[Variable] = self.trail
+        while len(trail) > mark:
+            trail.pop().binding = None
+
+    def _occurs(self, var: Variable, t: Term) -> bool:
+        stack: List[Term] = [t]
+        while stack:
+            t = self.deref(stack.pop())
+            if t is var:
+                return True
+            if isinstance(t, PList) and not t.ground:
+                stack.extend(t.elements)
+
+        return False
+
+    def _unify_head(self,
+                    head: Union[PList, TemplateList],
+                    args: PList,
+                    frame: Frame) -> bool:
+        """
+        Unifies the arguments of a clause template with the arguments of a goal
+        The first occurrence of a slot just takes the goal's term,
+        so no fresh variables are made for the head
+        """
+        stack: List[Tuple[Union[Term, Slot], Term]] = [(head, args)]
+
+        while stack:
+            t, a = stack.pop()
+
+            match t:
+                case Slot():
+                    val: Union[Term, None] = frame[t.index]
+                    if val is None:
+                        frame[t.index] = a
+                    elif not self._unify(val, a):
+                        return False
+
+                case TemplateList():
+                    a = self.deref(a)
+                    if isinstance(a, Variable):
+                        built: PList = ClauseTemplate.build_term(t, frame)
+                        if self._occurs(a, built):
+                            return False
+                        self._bind(a, built)
+                    elif isinstance(a, PList) and len(a) == len(t):
+                        stack.extend(zip(t.elements, a.elements))
+                    else:
+                        return False
+
+                case _:
+                    if not self._unify(t, a):
+                        return False
+
+        return True
+
+    def _unify(self, t1: Term, t2: Term) -> bool:
+        """
+        Unifies two terms in place, recording the bindings on the trail
+        The caller is responsible for undoing them on failure
+        """
+        stack: List[Tuple[Term, Term]] = [(t1, t2)]
+
+        while stack:
+            a, b = stack.pop()
+            a = self.deref(a)
+            b = self.deref(b)
+
+            if a is b:
+                continue
+
+            if isinstance(a, Variable):
+                if self._occurs(a, b):
+                    return False
+                self._bind(a, b)
+
+            elif isinstance(b, Variable):
+                if self._occurs(b, a):
+                    return False
+                self._bind(b, a)
+
+            elif isinstance(a, PList) and isinstance(b, PList):
+                if a.ground and b.ground:
+                    if a != b:
+                        return False
+                elif len(a) != len(b):
+                    return False
+                else:
+                    stack.extend(zip(a.elements, b.elements))
+
+            else:
+                return False # distinct atoms, atoms are interned
+
+        return True
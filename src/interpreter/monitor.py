@@ -0,0 +1,121 @@
+"""
+Module to represent the monitoring of a running query.
+The engines report each inference to the monitor of their knowledge base,
+which counts them and stops the search when it is asked to,
+possibly from another thread, or when the query runs out of its limits
+"""
+
+import sys
+import time
+from typing import NamedTuple, Union
+
+
+class QueryStopped(Exception):
+    """
+    Raised inside the engines when the running query is stopped
+    """
+
+
+class LimitReached(QueryStopped):
+    """
+    Raised inside the engines when the running query reaches one of its limits
+    """
+
+
+class Limits(NamedTuple):
+    """
+    The resources a query may use, None for no limit
+    """
+    answers: Union[int, None] = None
+    timeout: Union[float, None] = None # in seconds
+    inferences: Union[int, None] = None
+    depth: Union[int, None] = None
+
+
+class QueryMonitor:
+    """
+    Counts the inferences of a query and the time it has run for
+    """
+    __slots__ = ('inferences', 'started', 'finished', 'limits',
+                 'max_depth', '_deadline', '_next_check', '_stopped')
+
+    # the clock is only read once per so many inferences
+    CLOCK_EVERY: int = 256
+
+    def __init__(self) -> None:
+        self._stopped: bool = False
+        self.start()
+
+    def start(self, limits: Limits = Limits()) -> None:
+        """
+        Starts monitoring a new query
+        A stop asked for before it starts is kept, so the query stops at once
+        """
+        self.inferences: int = 0
+        self.started: float = time.monotonic()
+        self.finished: Union[float, None] = None
+        self.limits: Limits = limits
+        self.max_depth: int = limits.depth if limits.depth is not None\
+                              else sys.maxsize
+        self._deadline: Union[float, None] = self.started + limits.timeout\
+                                             if limits.timeout is not None else None
+        # the inference at which the stop flag and the limits are checked next
+        self._next_check: int = 0
+
+    def finish(self) -> None:
+        """
+        Marks the query as done, which stops the clock
+        """
+        self.finished = time.monotonic()
+
+    def stop(self) -> None:
+        """
+        Asks the running query to stop at its next inference
+        """
+        self._stopped = True
+        self._next_check = 0
+
+    def clear_stop(self) -> None:
+        """
+        Withdraws a stop which no query has seen yet
+        """
+        self._stopped = False
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Returns the seconds the query has run for
+        """
+        end: float = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+    def infer(self) -> None:
+        """
+        Counts an inference, the resolution of a goal or a derivation
+        """
+        self.inferences += 1
+        if self.inferences >= self._next_check:
+            self._check()
+
+    def _check(self) -> None:
+        if self._stopped:
+            self._stopped = False # the stop is spent on this query
+            raise QueryStopped("Query stopped.")
+
+        limit: Union[int, None] = self.limits.inferences
+        if limit is not None and self.inferences > limit:
+            raise LimitReached(f"Limit reached: {limit} inferences.")
+
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise LimitReached(f"Limit reached: {self.limits.timeout} s timeout.")
+
+        self._next_check = self.inferences + QueryMonitor.CLOCK_EVERY
+        if limit is not None:
+            self._next_check = min(self._next_check, limit + 1)
+
+    def reach(self, depth: int) -> None:
+        """
+        Checks the depth a resolution has reached
+        """
+        if depth > self.max_depth:
+            raise LimitReached(f"Limit reached: depth {self.max_depth}.")
@@ -0,0 +1,241 @@
+"""
+Module to represent the planning of conjunctions over fact tables.
+A run of goals whose predicates are made only of ground facts
+is evaluated as a sequence of joins instead of nested loops,
+each goal is looked up through a hash table of its facts or through
+the index of its predicate, whichever the cardinality estimates say is cheaper
+"""
+
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+from src.interpreter.terms import Atom, Variable, Predicate, Term,\
+                                  NfPredicate, Conjunction, Functor, PList
+
+Bindings = Dict[Variable, Atom]
+# a goal of a join, the columns of its variables bound by the goals before it,
+# and the first column of each of its other variables
+Step = Tuple[Predicate, List[Tuple[int, Variable]], Dict[Variable, int]]
+# the facts of a goal, by the values of its bound columns
+Table = Dict[Tuple[Atom, ...], List[Tuple[Atom, ...]]]
+# what a hash table is built from: the name of a goal, then for each column
+# its constant, -1 for a bound variable or the first column of a free one
+Shape = Tuple[object, ...]
+
+MAX_TABLES: int = 64 # hash tables kept between joins
+
+
+class ConjunctionPlanner:
+    """
+    Plans and evaluates conjunctions of goals over fact tables
+    """
+    def __init__(self, kb: "KnowledgeBase") -> None:
+        self.kb: "KnowledgeBase" = kb
+        # the hash tables built so far, valid for one version of the clauses
+        self._tables: Dict[Shape, Table] = {}
+        self._version: int = -1
+
+    def is_fact_goal(self, goal: Predicate) -> bool:
+        """
+        Checks whether a goal can be answered by a lookup in a fact table
+        """
+        functor: Functor = goal.functor
+        return not isinstance(goal, NfPredicate)\
+               and self.kb.fact_tables.get(functor, False)\
+               and functor not in self.kb.tabled
+
+    def fact_run(self, goal: Conjunction, idx: int) -> int:
+        """
+        Returns the number of consecutive goals, starting at idx,
+        which can be answered by fact tables
+        """
+        end: int = idx
+        while end < len(goal) and self.is_fact_goal(goal[end]):
+            end += 1
+
+        return end - idx
+
+    def _rows(self, goal: Predicate) -> List[Tuple[Atom, ...]]:
+        """
+        Returns the arguments of the facts matching the constants of a goal,
+        in program order
+        """
+        functor: Functor = goal.functor
+        facts: List[Predicate] = self.kb.clauses[functor]
+        # lists are constants too, which never equal the atoms of a fact
+        consts: List[Tuple[int, Term]] = [(i, arg)
+                                          for i, arg in enumerate(goal.arguments)
+                                          if not isinstance(arg, Variable)]
+        rows: List[Tuple[Atom, ...]] = []
+
+        for pos in self.kb.indexes[functor].candidates(goal):
+            args: Tuple[Atom, ...] = facts[pos].arguments.elements
+            if all(args[i] == const for i, const in consts):
+                rows.append(args)
+
+        return rows
+
+    def _table(self, step: Step) -> Table:
+        """
+        Builds the hash table of the facts of a goal,
+        on the columns of the variables bound before it
+        """
+        goal, shared, fresh = step
+        table: Table = {}
+        for args in self._rows(goal):
+            if self._consistent(goal, args, fresh):
+                table.setdefault(tuple(args[col] for col, _ in shared), [])\
+                     .append(args)
+
+        return table
+
+    def _cached_table(self, step: Step) -> Table:
+        """
+        Returns the hash table of a goal, built once for a version of the clauses
+        """
+        if self._version != self.kb.version or len(self._tables) == MAX_TABLES:
+            self._tables = {}
+            self._version = self.kb.version
+
+        shape: Shape = self._shape(step)
+        table: Union[Table, None] = self._tables.get(shape)
+        if table is None:
+            table = self._tables[shape] = self._table(step)
+
+        return table
+
+    @staticmethod
+    def _shape(step: Step) -> Shape:
+        goal, _, fresh = step
+        return (goal.name,) + tuple(fresh.get(arg, -1) if isinstance(arg, Variable)
+                                    else arg
+                                    for arg in goal.arguments)
+
+    def _estimate(self,
+                  goal: Predicate,
+                  bound: Set[Variable]) -> Tuple[float, float]:
+        """
+        Estimates the number of facts matching a goal
+        from the sizes of the buckets of the index of its predicate
+        :Returns: the facts matching its constants, and those matching
+                  once the values of its bound variables are given too
+        """
+        index: "ClauseIndex" = self.kb.indexes[goal.functor]
+        columns: List[Dict[Atom, List[int]]] = index.by_atom
+        size: int = len(index)
+        by_consts: float = size
+        by_all: float = size
+
+        for col, arg in zip(range(len(columns)), goal.arguments.elements):
+            if isinstance(arg, Atom):
+                by_consts = min(by_consts, len(columns[col].get(arg, ())))
+            elif isinstance(arg, Variable):
+                if arg in bound: # any value, an average bucket
+                    by_all = min(by_all, size / max(len(columns[col]), 1))
+            else:
+                by_consts = 0 # a list never equals an atom
+
+        return by_consts, min(by_consts, by_all)
+
+    def _lookup(self,
+                step: Step,
+                bindings: Bindings) -> Iterator[Tuple[Atom, ...]]:
+        """
+        Looks up the facts of a goal through the index of its predicate,
+        given the values of its bound variables
+        """
+        goal, shared, fresh = step
+        if shared:
+            args: List[Term] = list(goal.arguments.elements)
+            for col, var in shared:
+                args[col] = bindings[var]
+            goal = Predicate(goal.name, PList(args))
+
+        for row in self._rows(goal):
+            if self._consistent(step[0], row, fresh):
+                yield row
+
+    def join(self, goals: List[Predicate]) -> Union[Iterator[Bindings], None]:
+        """
+        Evaluates a conjunction of fact goals by hash joins
+        The facts of the first goal drive the join, so the solutions come
+        in the order the nested loop evaluation gives them
+        Each next goal is probed through a hash table of its facts, when more
+        probes are expected than it has facts to hash, or through the index
+        of its predicate, so a join called with a few bindings does not scan
+        :Returns: a lazy stream of the bindings of the variables of the goals,
+                  or None if no goal is worth a hash table,
+                  and the goals are better left to the nested loops
+        """
+        if self._version != self.kb.version:
+            self._tables = {}
+            self._version = self.kb.version
+
+        bound: Set[Variable] = set()
+        steps: List[Step] = []
+        hashed: List[bool] = []
+        probes: float = 1 # the expected partial solutions reaching the next goal
+        for goal in goals:
+            shared: List[Tuple[int, Variable]] = []
+            fresh: Dict[Variable, int] = {}
+            for col, arg in enumerate(goal.arguments):
+                if not isinstance(arg, Variable):
+                    continue
+                if arg in bound:
+                    shared.append((col, arg))
+                elif arg not in fresh:
+                    fresh[arg] = col
+
+            step: Step = (goal, shared, fresh)
+            # a hash table is built from the facts matching the constants
+            by_consts, by_all = self._estimate(goal, bound)
+            hashed.append(bool(steps) and (probes >= by_consts
+                                           or bool(self._tables)
+                                           and self._shape(step) in self._tables))
+            probes *= by_all
+
+            bound.update(fresh)
+            steps.append(step)
+
+        if not any(hashed):
+            return None
+
+        tables: List[Union[Table, None]] = [None] * len(goals)
+        monitor: "QueryMonitor" = self.kb.monitor
+
+        def probe(i: int, bindings: Bindings) -> Iterator[Bindings]:
+            if i == len(steps):
+                yield bindings
+                return
+
+            monitor.infer() # a lookup of the facts of a goal
+            _, shared, fresh = steps[i]
+            if hashed[i]:
+                table: Union[Table, None] = tables[i]
+                if table is None:
+                    table = tables[i] = self._cached_table(steps[i])
+                rows: Iterable[Tuple[Atom, ...]] =\
+                    table.get(tuple(bindings[var] for _, var in shared), ())
+            else:
+                rows = self._lookup(steps[i], bindings)
+
+            for args in rows:
+                extended: Bindings = dict(bindings)
+                for var, col in fresh.items():
+                    extended[var] = args[col]
+                yield from probe(i + 1, extended)
+
+        return probe(0, {})
+
+    @staticmethod
+    def _consistent(goal: Predicate,
+                    args: List[Atom],
+                    fresh: Dict[Variable, int]) -> bool:
+        """
+        Checks that a variable repeated in a goal gets the same value everywhere
+        """
+        for col, arg in enumerate(goal.arguments):
+            if isinstance(arg, Variable) and arg in fresh\
+               and args[fresh[arg]] != args[col]:
+                return False
+
+        return True
@@ -0,0 +1,124 @@
+"""
+Module to represent the profiling of the SLD resolution of a knowledge base.
+The calls of each predicate are counted and timed, per name/arity.
+The time of a call is only spent while its stream of answers is advanced,
+so it is measured around each step of the stream
+"""
+
+import json
+import time
+from typing import Dict, Iterator, List, Tuple, Union
+
+from src.interpreter.terms import Predicate
+
+Key = Tuple[str, int] # name/arity of a predicate
+
+
+class PredicateStats:
+    """
+    The counts and times of the calls of a predicate
+    """
+    __slots__ = ('calls', 'attempts', 'unifications', 'failures',
+                 'cumulative', 'own', 'active')
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.attempts: int = 0 # clauses tried
+        self.unifications: int = 0 # clauses whose heads unified with the goal
+        self.failures: int = 0 # calls without any answer
+        self.cumulative: float = 0.0 # seconds, the calls it makes included
+        self.own: float = 0.0 # seconds, the calls it makes excluded
+        self.active: int = 0 # calls being advanced right now, for recursion
+
+    def report(self) -> Dict[str, Union[int, float]]:
+        """
+        Returns the stats as a dictionary
+        """
+        return {"calls": self.calls,
+                "attempts": self.attempts,
+                "unifications": self.unifications,
+                "failures": self.failures,
+                "cumulative_time": self.cumulative,
+                "self_time": self.own}
+
+
+class Profiler:
+    """
+    Collects the stats of the predicates called by the queries
+    """
+    def __init__(self) -> None:
+        self.stats: Dict[Key, PredicateStats] = {}
+        self.inferences: int = 0
+        self.time: float = 0.0 # seconds, over all queries profiled
+        # for each step being timed, the time spent in the calls it made
+        self._children: List[float] = []
+
+    def predicate(self, goal: Predicate) -> PredicateStats:
+        """
+        Returns the stats of the predicate of a goal
+        """
+        key: Key = (goal.name, len(goal))
+        stats: Union[PredicateStats, None] = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = PredicateStats()
+
+        return stats
+
+    def call(self, goal: Predicate, answers: Iterator[Predicate]) -> Iterator[Predicate]:
+        """
+        Counts a call of a goal, and times its stream of answers
+        """
+        stats: PredicateStats = self.predicate(goal)
+        stats.calls += 1
+        children: List[float] = self._children
+        found: bool = False
+
+        while True:
+            children.append(0.0)
+            stats.active += 1
+            start: float = time.perf_counter()
+            try:
+                answer: Union[Predicate, None] = next(answers, None)
+            finally:
+                spent: float = time.perf_counter() - start
+                stats.active -= 1
+                stats.own += spent - children.pop()
+                if not stats.active: # recursive calls are already counted
+                    stats.cumulative += spent
+                if children:
+                    children[-1] += spent
+
+            if answer is None:
+                break
+
+            found = True
+            yield answer
+
+        if not found:
+            stats.failures += 1
+
+    def add_query(self, inferences: int, elapsed: float) -> None:
+        """
+        Counts the inferences and the time of a query
+        """
+        self.inferences += inferences
+        self.time += elapsed
+
+    def report(self) -> Dict[str, object]:
+        """
+        Returns the stats of all predicates, the slowest first
+        """
+        ranked: List[Tuple[Key, PredicateStats]] = sorted(self.stats.items(),
+                                                          key=lambda item: -item[1].own)
+        return {"inferences": self.inferences,
+                "time": self.time,
+                "inferences_per_second": self.inferences / self.time if self.time else 0.0,
+                "predicates": {f"{name}/{arity}": stats.report()
+                               for (name, arity), stats in ranked}}
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the report as JSON
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
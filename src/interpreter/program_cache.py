@@ -0,0 +1,95 @@
+"""
+Module to represent a cache of parsed programs.
+A program which is loaded again without changes is not parsed at all,
+after an edit only the clauses whose text has changed are parsed again
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Union
+
+from src.interpreter.terms import Fact, Rule
+from src.interpreter.prolog_parser import PrologParser, Directive
+from src.interpreter.knowledge_base import KnowledgeBase
+
+Statement = Union[Fact, Rule, Directive]
+
+
+class ProgramCache:
+    """
+    Keeps the statements parsed from the text of each clause of a program
+    """
+    # the text of a clause or directive: anything up to a period
+    # which is not in a quoted atom or in a comment
+    CLAUSE: re.Pattern = re.compile(r"(?:'[^']*'|%[^\n]*|/\*[\s\S]*?\*/|/(?!\*)|[^'%/.])*\.")
+
+    def __init__(self) -> None:
+        self.digest: Union[bytes, None] = None # of the last program loaded
+        self.kb: Union[KnowledgeBase, None] = None
+        self.version: int = 0 # of the knowledge base, when it was loaded
+        self.statements: Dict[str, List[Statement]] = {}
+
+    @staticmethod
+    def hash(content: str) -> bytes:
+        """
+        Returns the digest of a program text
+        """
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def split(content: str) -> Union[List[str], None]:
+        """
+        Splits a program into the texts of its clauses
+        :Returns: None if the program does not split cleanly,
+                  e.g. when a clause is not terminated
+        """
+        chunks: List[str] = []
+        end: int = 0
+        for match in ProgramCache.CLAUSE.finditer(content):
+            if match.start() != end:
+                return None
+            chunks.append(match.group())
+            end = match.end()
+
+        if content[end:].strip():
+            return None
+
+        return chunks
+
+    def load(self, content: str) -> KnowledgeBase:
+        """
+        Returns the knowledge base of a program
+        The last one is returned as it is if neither the program
+        nor its clauses have changed since
+        """
+        digest: bytes = self.hash(content)
+        if digest == self.digest and self.kb.version == self.version:
+            return self.kb
+
+        self.digest = None
+        chunks: Union[List[str], None] = self.split(content)
+        statements: Dict[str, List[Statement]] = {}
+        try:
+            for chunk in chunks or ():
+                if chunk not in statements:
+                    cached: Union[List[Statement], None] = self.statements.get(chunk)
+                    statements[chunk] = cached if cached is not None\
+                                        else list(PrologParser(chunk).parse_statements())
+        except ValueError:
+            chunks = None
+
+        if chunks is None:
+            # parsed as a whole, so that errors report their right positions
+            self.statements = {}
+            kb: KnowledgeBase = PrologParser(content).parse_program()
+        else:
+            self.statements = statements # only the clauses of the program are kept
+            kb = KnowledgeBase()
+            for chunk in chunks:
+                for statement in statements[chunk]:
+                    kb.add_statement(statement)
+
+        self.kb = kb
+        self.digest, self.version = digest, kb.version
+
+        return kb
@@ -1,54 +1,91 @@
 """
 A parser for Prolog programs
 """
-from typing import List, Union, Dict
-from src.interpreter.tokenizer import Tokenizer
+from typing import Iterator, List, Set, Union, Dict, Tuple
+from src.interpreter.tokenizer import Tokenizer, Token
 from src.interpreter.terms import Atom, Variable, PList, Predicate,\
                                   NfPredicate, Fact, Rule,\
-                                  Conjunction
+                                  Conjunction, Term
 
 from src.interpreter.knowledge_base import KnowledgeBase
+from src.interpreter.dynamic import BUILTINS, clause_term
+
+# the calls parsed as builtins when their argument is a clause
+BUILTIN_NAMES: Set[str] = {name for name, _ in BUILTINS}
+
+# a directive: its name and the predicate indicators it applies to
+Directive = Tuple[str, List[Tuple[str, int]]]
 
 class PrologParser:
     """
-    A parser for Prolog programs
+    A predictive parser for Prolog programs
+    Every decision is made by looking at the current token only,
+    so each token is scanned and read exactly once, without backtracking
     """
+    EOF: Token = ("EOF", "") # the current token, once all of them are consumed
+
     def __init__(self, text: str) -> None:
         self.text: str = text
-        t: Tokenizer = Tokenizer()
-        t.tokenize(text)
-        self.tokens: List = t.tokens # this might throw an exception,
-                                # but we don't catch it here
-        self.index = 0 # index of the current token
+        self.tokenizer: Tokenizer = Tokenizer()
+        # tokens are scanned as they are needed, scanning might throw an exception,
+        # but we don't catch it here
+        self._tokens: Iterator[Token] = self.tokenizer.scan(text)
+        self.current: Token = PrologParser.EOF
+        self.index: int = -1 # index of the current token
         self._bv: Dict[str, Variable] = {} # set of bound variables
+        self._ground: Dict[PList, PList] = {} # ground lists, shared between clauses
+        self.advance()
 
-    def parse_atom(self) -> Atom:
+    def advance(self) -> Token:
         """
-        Parses an atom
+        Moves to the next token
+        :Returns: the token which was current before
         """
-        atom = Atom(self.tokens[self.index][1])
+        token: Token = self.current
+        self.current = next(self._tokens, PrologParser.EOF)
         self.index += 1
 
-        return atom
+        return token
+
+    def at_eof(self) -> bool:
+        """
+        Checks whether all tokens have been consumed
+        """
+        return self.current is PrologParser.EOF
+
+    def expect(self, token_type: str, expected: str) -> Token:
+        """
+        Consumes a token of the given type
+        :Returns: the consumed token
+        """
+        if self.current[0] != token_type:
+            self.exp_error(expected, self.current[0])
+
+        return self.advance()
+
+    def parse_atom(self) -> Atom:
+        """
+        Parses an atom
+        """
+        return Atom(self.advance()[1])
 
     def parse_variable(self) -> Variable:
         """
         Parses a variable
         """
-        if self.tokens[self.index][0] == "WILDCARD":
-            self.index += 1
+        token_type, name = self.current
+        if token_type == "WILDCARD":
+            self.advance()
             return Variable("_") # it is never bound
 
-        if self.tokens[self.index][0] != "VARIABLE":
-            self.exp_error("a variable",
-                            str(self.tokens[self.index][0]))
+        if token_type != "VARIABLE":
+            self.exp_error("a variable", token_type)
 
-        var: Variable = self._bv.get(self.tokens[self.index][1], None)
+        var: Variable = self._bv.get(name, None)
         if not var:
-            var = Variable(self.tokens[self.index][1])
-            self._bv[self.tokens[self.index][1]] = var
+            var = self._bv[name] = Variable(name)
 
-        self.index += 1
+        self.advance()
 
         return var
 
@@ -56,19 +93,15 @@ class PrologParser:
         """
         Parses an argument
         """
-        if self.tokens[self.index][0] == "VARIABLE" \
-          or self.tokens[self.index][0] == "WILDCARD":
-            return self.parse_variable()
-
-        if self.tokens[self.index][0] == "ATOM"\
-          or self.tokens[self.index][0] == "INTEGER"\
-          or self.tokens[self.index][0] =="QUOTED_ATOM":
-            return self.parse_atom()
-
-        if self.tokens[self.index][0] == "LBRACKET":
-            return self.parse_plist()
+        match self.current[0]:
+            case "VARIABLE" | "WILDCARD":
+                return self.parse_variable()
+            case "ATOM" | "INTEGER" | "QUOTED_ATOM":
+                return self.parse_atom()
+            case "LBRACKET":
+                return self.parse_plist()
 
-        self.exp_error("an atom, variable or list", str(self.tokens[self.index][0]))
+        self.exp_error("an atom, variable or list", self.current[0])
 
     def parse_plist(self,
                     opener: str = "LBRACKET",
@@ -77,53 +110,44 @@ class PrologParser:
         Parses a list of elements
         """
         elements = []
-        self.index += 1 # skip the opener
+        self.advance() # skip the opener
 
-        if self.tokens[self.index][0] == closer:
-            self.index += 1
-            return PList(elements)
-
-        while self.tokens[self.index][0] != closer \
-              and self.index < len(self.tokens):
+        if self.current[0] == closer:
+            self.advance()
+            return self.shared(PList(elements))
 
+        while True:
             elements.append(self.parse_argument())
 
-            if self.index >= len(self.tokens):
-                self.eof_error("a closing bracket")
-
-            if self.tokens[self.index][0] == "COMMA":
-                self.index += 1
-
-            elif self.tokens[self.index][0] != closer:
-                self.exp_error("a closing bracket",
-                                str(self.tokens[self.index][0]))
+            token_type: str = self.current[0]
+            if token_type == "COMMA":
+                self.advance()
+            elif token_type != closer:
+                self.exp_error("a closing bracket", token_type)
             else: # closer
-                self.index += 1
+                self.advance()
+                if opener == "LBRACKET":
+                    return self.shared(PList(elements))
                 return PList(elements)
 
-        self.exp_error("a closing bracket",
-                       str(self.tokens[self.index][0]))
-
-    def parse_predicate(self) -> Predicate: # positive literal
+    def shared(self, plist: PList) -> PList:
         """
-        Parses a predicate
+        Returns the single shared copy of a ground list
+        Lists with variables are returned as they are
         """
-        if self.tokens[self.index][0] != "ATOM":
-            self.exp_error("an atom",
-                            str(self.tokens[self.index][0]))
+        if not plist.ground:
+            return plist
 
-        name = self.tokens[self.index][1]
-        self.index += 1
-
-        if self.index >= len(self.tokens):
-            self.eof_error("an openning parenthesis")
+        return self._ground.setdefault(plist, plist)
 
-        if self.tokens[self.index][0] != "LPAREN":
-            if self.tokens[self.index][0] == "PERIOD":
-                return Predicate(name, PList([]))
+    def parse_predicate(self) -> Predicate: # positive literal
+        """
+        Parses a predicate, without parentheses if it has no arguments
+        """
+        name: str = self.expect("ATOM", "an atom")[1]
 
-            self.exp_error("an openning parenthesis",
-                            str(self.tokens[self.index][0]))
+        if self.current[0] != "LPAREN":
+            return Predicate(name, self.shared(PList([])))
 
         arguments = self.parse_plist("LPAREN", "RPAREN")
         return Predicate(name, arguments)
@@ -132,31 +156,10 @@ class PrologParser:
         """
         Parses a negative literal
         """
-        if self.tokens[self.index][0] != "NOT":
-            self.exp_error("a not",
-                           str(self.tokens[self.index][0]))
-        self.index += 1
-
-        if self.index >= len(self.tokens):
-            self.eof_error("opening parenthesis")
-
-        if self.tokens[self.index][0] != "LPAREN":
-            self.exp_error("openning parenthesis",
-                            str(self.tokens[self.index][0]))
-        self.index += 1
-
-        if self.index >= len(self.tokens):
-            self.eof_error("atom")
-
+        self.expect("NOT", "a not")
+        self.expect("LPAREN", "openning parenthesis")
         pred: Predicate = self.parse_predicate()
-
-        if self.index >= len(self.tokens):
-            self.eof_error("closing parenthesis")
-
-        if self.tokens[self.index][0] != "RPAREN":
-            self.exp_error("closing parenthesis",
-                            str(self.tokens[self.index][0]))
-        self.index += 1
+        self.expect("RPAREN", "closing parenthesis")
 
         return NfPredicate(pred.name, pred.arguments)
 
@@ -168,25 +171,85 @@ class PrologParser:
             self._bv = {} # reset the bound variables
 
         predicates: List[Predicate] = []
-        while self.tokens[self.index][0] != "PERIOD":
-            if self.tokens[self.index][0] == "NOT":
+        while self.current[0] != "PERIOD":
+            if self.current[0] == "NOT":
                 predicates.append(self.parse_nf_predicate())
+            elif self.current[1] in BUILTIN_NAMES and self.current[0] == "ATOM":
+                predicates.append(self.parse_builtin())
             else:
                 predicates.append(self.parse_predicate())
 
-            if self.index >= len(self.tokens):
-                self.eof_error("a comma or end of clause")
+            token_type: str = self.current[0]
+            if token_type == "COMMA":
+                self.advance()
+            elif token_type != "PERIOD":
+                self.exp_error("a comma or end of clause", token_type)
 
-            if self.tokens[self.index][0] == "COMMA":
-                self.index += 1
-            elif self.tokens[self.index][0] != "PERIOD":
-                self.exp_error("a comma or end of clause",
-                                str(self.tokens[self.index][0]))
-
-        self.index += 1
+        self.advance()
 
         return Conjunction(predicates)
 
+    def parse_literal(self) -> Predicate:
+        """
+        Parses a positive or a negative literal
+        """
+        if self.current[0] == "NOT":
+            return self.parse_nf_predicate()
+
+        return self.parse_predicate()
+
+    def parse_builtin(self) -> Predicate:
+        """
+        Parses a call to a builtin whose argument is a clause,
+        such as assertz(p(a)) or retract((p(X) :- q(X))),
+        or a call to a predicate of the same name and another arity
+        """
+        name: str = self.expect("ATOM", "an atom")[1]
+        if self.current[0] != "LPAREN":
+            return Predicate(name, self.shared(PList([])))
+        self.advance()
+
+        if self.current[0] == "ATOM":
+            head: Predicate = self.parse_predicate()
+            if self.current[0] == "RPAREN" or head.arguments:
+                self.expect("RPAREN", "closing parenthesis")
+                return Predicate(name, PList([clause_term(head)]))
+
+            # an atom followed by more arguments
+            return self._call_arguments(name, [Atom(head.name)])
+
+        if self.current[0] != "LPAREN":
+            return self._call_arguments(name, [])
+
+        self.advance() # a rule is enclosed in parentheses
+        head = self.parse_predicate()
+        clause: Union[Fact, Rule] = head
+        if self.current[0] == "IMPLICATION":
+            self.advance()
+            body: List[Predicate] = [self.parse_literal()]
+            while self.current[0] == "COMMA":
+                self.advance()
+                body.append(self.parse_literal())
+            clause = Rule(head, Conjunction(body))
+
+        self.expect("RPAREN", "closing parenthesis")
+        self.expect("RPAREN", "closing parenthesis")
+
+        return Predicate(name, PList([clause_term(clause)]))
+
+    def _call_arguments(self, name: str, elements: List[Term]) -> Predicate:
+        """
+        Parses the rest of the arguments of a call, after the ones given
+        """
+        while not elements or self.current[0] == "COMMA":
+            if elements:
+                self.advance()
+            elements.append(self.parse_argument())
+
+        self.expect("RPAREN", "closing parenthesis")
+
+        return Predicate(name, self.shared(PList(elements)))
+
     def parse_rule(self) -> Rule:
         """
         Parses a rule
@@ -194,15 +257,7 @@ class PrologParser:
         self._bv = {} # reset the bound variables
 
         head: Predicate = self.parse_predicate()
-        if self.index >= len(self.tokens):
-            self.eof_error("implication")
-
-
-        if self.tokens[self.index][0] != "IMPLICATION":
-            self.exp_error("implication",
-                            str(self.tokens[self.index][0]))
-
-        self.index += 1
+        self.expect("IMPLICATION", "implication")
         tail: Conjunction = self.parse_goal(True)
 
         return Rule(head, tail)
@@ -214,37 +269,81 @@ class PrologParser:
         self._bv = {} # reset the bound variables
 
         pred: Predicate = self.parse_predicate()
-        if self.index >= len(self.tokens):
-            self.eof_error("end of clause")
+        self.expect("PERIOD", "end of clause")
 
-        if self.tokens[self.index][0] != "PERIOD":
-            self.exp_error("end of clause",
-                           str(self.tokens[self.index][0]))
-
-        self.index += 1
         return Fact(pred.name, pred.arguments)
 
     def parse_program_clause(self) -> Union[Fact, Rule]:
         """
-        Parses a clause of a Horn program 
+        Parses a clause of a Horn program
+        The head is parsed once, the token after it tells
+        whether the clause is a fact or a rule
         """
-        temp_id: int = self.index
-        try:
-            e: Fact = self.parse_fact()
-            return e
-        except ValueError:
-            self.index = temp_id
-            return self.parse_rule()
+        self._bv = {} # reset the bound variables
+
+        head: Predicate = self.parse_predicate()
+
+        match self.current[0]:
+            case "PERIOD":
+                self.advance()
+                return Fact(head.name, head.arguments)
+            case "IMPLICATION":
+                self.advance()
+                return Rule(head, self.parse_goal(True))
+
+        self.exp_error("end of clause or implication", self.current[0])
+
+    def parse_indicator(self) -> Tuple[str, int]:
+        """
+        Parses a predicate indicator name/arity
+        """
+        name: str = self.expect("ATOM", "a predicate name")[1]
+        self.expect("SLASH", "a predicate indicator")
+        arity: str = self.expect("INTEGER", "a predicate indicator")[1]
+
+        return name, int(arity)
+
+    def parse_directive(self) -> Directive:
+        """
+        Parses a directive such as :- table ancestor/2, path/2.
+        :Returns: the name of the directive and its predicate indicators
+        """
+        self.expect("IMPLICATION", "a directive")
+        name: str = self.expect("ATOM", "a directive")[1]
+
+        indicators: List[Tuple[str, int]] = []
+        while True:
+            indicators.append(self.parse_indicator())
+
+            token_type: str = self.advance()[0]
+            if token_type == "PERIOD":
+                return name, indicators
+
+            if token_type != "COMMA":
+                self.exp_error("a comma or end of clause", token_type)
+
+    def parse_statements(self) -> Iterator[Union[Fact, Rule, Directive]]:
+        """
+        Parses the clauses and directives of a Horn program, one at a time
+        """
+        while not self.at_eof():
+            if self.current[0] == "IMPLICATION":
+                name, indicators = self.parse_directive()
+                if name != "table":
+                    raise ValueError(f"Unknown directive: {name}.")
+
+                yield name, indicators
+                continue
 
+            yield self.parse_program_clause()
 
     def parse_program(self) -> KnowledgeBase:
         """
         Parses a Horn program
         """
         kb: KnowledgeBase = KnowledgeBase()
-        while self.index < len(self.tokens):
-            clause = self.parse_program_clause()
-            kb.add_clause(clause)
+        for statement in self.parse_statements():
+            kb.add_statement(statement)
         return kb
 
     @staticmethod
@@ -0,0 +1,393 @@
+"""
+Module to represent compiled snapshots of knowledge bases.
+A snapshot is a binary file of 32-bit words holding the symbol table,
+the clauses of every predicate and their argument indexes.
+It is memory-mapped when loaded: clauses, their templates and
+the indexes of a predicate are only decoded when they are first accessed
+"""
+
+import mmap
+from array import array
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+from src.interpreter.terms import Atom, Variable, PList, Term,\
+                                  Predicate, NfPredicate,\
+                                  Conjunction, Fact, Rule, Functor
+
+from src.interpreter.indexing import ClauseIndex
+from src.interpreter.templates import ClauseTemplate
+from src.interpreter.knowledge_base import KnowledgeBase
+
+MAGIC: bytes = b"PLKB"
+VERSION: int = 2 # predicates keyed by name/arity
+BYTE_ORDER: int = 0x01020304 # reads differently on a machine of the other endianness
+
+# the header: magic, version, byte order, then the positions of the sections
+HEADER_SIZE: int = 6
+
+# tags of the encoded terms
+ATOM, VARIABLE, LIST = 0, 1, 2
+
+# kinds of the encoded clauses
+FACT, RULE = 0, 1
+
+
+class SnapshotWriter:
+    """
+    Encodes a knowledge base into the words of a snapshot
+    """
+    def __init__(self, kb: KnowledgeBase) -> None:
+        self.kb: KnowledgeBase = kb
+        self.words: array = array('I', [0] * HEADER_SIZE)
+        self.symbols: Dict[str, int] = {}
+
+    def symbol(self, name: str) -> int:
+        """
+        Returns the number of a symbol in the symbol table
+        """
+        return self.symbols.setdefault(name, len(self.symbols))
+
+    def _term(self,
+              t: Term,
+              numbering: Dict[Variable, int],
+              out: array) -> None:
+        match t:
+            case Variable():
+                out.extend((VARIABLE, numbering.setdefault(t, len(numbering))))
+            case PList():
+                out.extend((LIST, len(t)))
+                for e in t.elements:
+                    self._term(e, numbering, out)
+            case _: # Atom
+                out.extend((ATOM, self.symbol(t.name)))
+
+    def _predicate(self,
+                   p: Predicate,
+                   numbering: Dict[Variable, int],
+                   out: array) -> None:
+        out.extend((self.symbol(p.name), isinstance(p, NfPredicate)))
+        self._term(p.arguments, numbering, out)
+
+    def clause(self, clause: Union[Fact, Rule]) -> int:
+        """
+        Encodes a clause: its kind, the names of its variables,
+        the length of its body and then its predicates
+        :Returns: the position of the clause
+        """
+        numbering: Dict[Variable, int] = {}
+        body: array = array('I')
+
+        if isinstance(clause, Rule):
+            kind: int = RULE
+            preds: List[Predicate] = [clause.head] + list(clause.tail)
+        else:
+            kind = FACT
+            preds = [clause]
+
+        for p in preds:
+            self._predicate(p, numbering, body)
+
+        pos: int = len(self.words)
+        self.words.extend((kind, len(numbering)))
+        self.words.extend(self.symbol(var.name) for var in numbering)
+        self.words.append(len(preds) - 1)
+        self.words.extend(body)
+
+        return pos
+
+    def index(self, index: ClauseIndex) -> int:
+        """
+        Encodes an index: the positions of its columns, then for every
+        argument position the clauses with a variable there
+        and the clauses of each atom found there
+        :Returns: the position of the index
+        """
+        pos: int = len(self.words)
+        self.words.append(len(index.by_atom))
+        self.words.extend([0] * len(index.by_atom))
+
+        for i, (by_atom, unbound) in enumerate(zip(index.by_atom, index.unbound)):
+            self.words[pos + 1 + i] = len(self.words)
+            self.words.append(len(unbound))
+            self.words.extend(unbound)
+            self.words.append(len(by_atom))
+            for atom, positions in by_atom.items():
+                self.words.extend((self.symbol(atom.name), len(positions)))
+                self.words.extend(positions)
+
+        return pos
+
+    def encode(self) -> bytes:
+        """
+        :Returns: the contents of the snapshot file
+        """
+        entries: List[Tuple[int, ...]] = []
+        for functor in self.kb.clauses:
+            clauses: List[Union[Fact, Rule]] = self.kb.clauses_of(functor)
+            index: ClauseIndex = self.kb.indexes[functor]
+            if index.front is not None or index.removed:
+                index = ClauseIndex() # numbered in program order, as the clauses are
+                for clause in clauses:
+                    index.add(clause)
+
+            offsets: array = array('I', [self.clause(c) for c in clauses])
+            offsets_pos: int = len(self.words)
+            self.words.extend(offsets)
+            entries.append((self.symbol(functor[0]),
+                            functor[1],
+                            self.kb.fact_tables.get(functor, False),
+                            len(offsets),
+                            offsets_pos,
+                            self.index(index)))
+
+        tabled_pos: int = len(self.words)
+        self.words.append(len(self.kb.tabled))
+        for name, arity in sorted(self.kb.tabled):
+            self.words.extend((self.symbol(name), arity))
+
+        predicates_pos: int = len(self.words)
+        self.words.append(len(entries))
+        for entry in entries:
+            self.words.extend(entry)
+
+        # the symbol table: byte offsets of the names in the blob which follows
+        blob: bytearray = bytearray()
+        symbols_pos: int = len(self.words)
+        self.words.append(len(self.symbols))
+        for name in self.symbols: # in order of numbering
+            self.words.append(len(blob))
+            blob += name.encode("utf-8")
+        self.words.append(len(blob))
+        blob += bytes(-len(blob) % 4) # the file is a whole number of words
+
+        self.words[:HEADER_SIZE] = array('I', [int.from_bytes(MAGIC, "little"),
+                                               VERSION, BYTE_ORDER,
+                                               symbols_pos, tabled_pos,
+                                               predicates_pos])
+
+        return self.words.tobytes() + bytes(blob)
+
+
+class LazyList:
+    """
+    A list whose items are decoded the first time they are accessed
+    Items appended afterwards are stored as they are
+    """
+    __slots__ = ('_decode', '_items')
+
+    def __init__(self,
+                 decode: Callable[[int], object],
+                 size: int) -> None:
+        self._decode: Callable[[int], object] = decode
+        self._items: List[object] = [None] * size
+
+    def __getitem__(self, i: int) -> object:
+        item: object = self._items[i]
+        if item is None:
+            item = self._items[i] = self._decode(i % len(self._items))
+
+        return item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[object]:
+        for i in range(len(self._items)):
+            yield self[i]
+
+    def __eq__(self, o: object) -> bool:
+        if isinstance(o, (list, LazyList)):
+            return list(self) == list(o)
+
+        return False
+
+    def append(self, item: object) -> None:
+        self._items.append(item)
+
+
+class LazyIndexes(dict):
+    """
+    The indexes of the predicates of a snapshot, decoded on first use
+    """
+    def __init__(self, decode: Callable[[Functor], Union[ClauseIndex, None]]) -> None:
+        super().__init__()
+        self._decode: Callable[[Functor], Union[ClauseIndex, None]] = decode
+
+    def __missing__(self, functor: Functor) -> ClauseIndex:
+        index: Union[ClauseIndex, None] = self._decode(functor)
+        if index is None:
+            raise KeyError(functor)
+
+        self[functor] = index
+        return index
+
+
+class Snapshot:
+    """
+    A memory-mapped snapshot file
+    """
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._map: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < 4 * HEADER_SIZE or self._map[:4] != MAGIC:
+            raise ValueError("Not a knowledge base snapshot: " + path)
+
+        self.words: memoryview = memoryview(self._map).cast('I')
+
+        if self.words[2] != BYTE_ORDER:
+            raise ValueError("Snapshot written with another byte order: " + path)
+        if self.words[1] != VERSION:
+            raise ValueError("Unsupported snapshot version: " + str(self.words[1]))
+
+        symbols_pos: int = self.words[3]
+        self._symbol_count: int = self.words[symbols_pos]
+        self._symbol_offsets: memoryview = self.words[symbols_pos + 1:
+                                                      symbols_pos + self._symbol_count + 2]
+        self._blob: int = 4 * (symbols_pos + self._symbol_count + 2) # in bytes
+        self._symbols: List[Union[str, None]] = [None] * self._symbol_count
+
+        self._indexes: Dict[Functor, Tuple[int, int]] = {} # position and size, by predicate
+
+    def symbol(self, i: int) -> str:
+        """
+        Returns a symbol of the symbol table
+        """
+        name: Union[str, None] = self._symbols[i]
+        if name is None:
+            start: int = self._blob + self._symbol_offsets[i]
+            end: int = self._blob + self._symbol_offsets[i + 1]
+            name = self._symbols[i] = str(self._map[start:end], "utf-8")
+
+        return name
+
+    def _term(self,
+              pos: int,
+              variables: List[Variable]) -> Tuple[Term, int]:
+        tag: int = self.words[pos]
+        value: int = self.words[pos + 1]
+        pos += 2
+
+        if tag == ATOM:
+            return Atom(self.symbol(value)), pos
+
+        if tag == VARIABLE:
+            return variables[value], pos
+
+        elements: List[Term] = []
+        for _ in range(value):
+            e, pos = self._term(pos, variables)
+            elements.append(e)
+
+        return PList(elements), pos
+
+    def _predicate(self,
+                   pos: int,
+                   variables: List[Variable]) -> Tuple[Predicate, int]:
+        name: str = self.symbol(self.words[pos])
+        negated: int = self.words[pos + 1]
+        arguments, pos = self._term(pos + 2, variables)
+
+        return (NfPredicate if negated else Predicate)(name, arguments), pos
+
+    def clause(self, pos: int) -> Union[Fact, Rule]:
+        """
+        Decodes the clause at the position
+        """
+        kind: int = self.words[pos]
+        count: int = self.words[pos + 1]
+        variables: List[Variable] = [Variable(self.symbol(s))
+                                     for s in self.words[pos + 2:pos + 2 + count]]
+        pos += 2 + count
+
+        body_length: int = self.words[pos]
+        head, pos = self._predicate(pos + 1, variables)
+        if kind == FACT:
+            return head
+
+        body: List[Predicate] = []
+        for _ in range(body_length):
+            p, pos = self._predicate(pos, variables)
+            body.append(p)
+
+        return Rule(head, Conjunction(body))
+
+    def index(self, functor: Functor) -> Union[ClauseIndex, None]:
+        """
+        Decodes the index of a predicate,
+        the atoms of a column are only decoded when it is first used
+        """
+        if functor not in self._indexes:
+            return None
+
+        pos, size = self._indexes[functor]
+        columns: memoryview = self.words[pos + 1:pos + 1 + self.words[pos]]
+
+        index: ClauseIndex = ClauseIndex()
+        index.size = size
+        for col in columns:
+            count: int = self.words[col]
+            index.unbound.append(self.words[col + 1:col + 1 + count].tolist())
+        index.by_atom = LazyList(lambda k: self._column(columns[k]), len(columns))
+
+        return index
+
+    def _column(self, pos: int) -> Dict[Atom, List[int]]:
+        pos += 1 + self.words[pos] # skip the clauses with variables
+
+        by_atom: Dict[Atom, List[int]] = {}
+        buckets: int = self.words[pos]
+        pos += 1
+        for _ in range(buckets):
+            atom: Atom = Atom(self.symbol(self.words[pos]))
+            count: int = self.words[pos + 1]
+            by_atom[atom] = self.words[pos + 2:pos + 2 + count].tolist()
+            pos += 2 + count
+
+        return by_atom
+
+    def knowledge_base(self) -> KnowledgeBase:
+        """
+        Returns the knowledge base of the snapshot,
+        its predicates are decoded as they are used
+        """
+        kb: KnowledgeBase = KnowledgeBase()
+        kb.indexes = LazyIndexes(self.index)
+
+        tabled_pos: int = self.words[4]
+        for i in range(self.words[tabled_pos]):
+            kb.tabled.add((self.symbol(self.words[tabled_pos + 1 + 2 * i]),
+                           self.words[tabled_pos + 2 + 2 * i]))
+
+        predicates_pos: int = self.words[5]
+        for i in range(self.words[predicates_pos]):
+            name_sym, arity, fact_table, size, offsets_pos, index_pos =\
+                self.words[predicates_pos + 1 + 6 * i:predicates_pos + 7 + 6 * i]
+            functor: Functor = (self.symbol(name_sym), arity)
+
+            offsets: memoryview = self.words[offsets_pos:offsets_pos + size]
+            clauses: LazyList = LazyList(lambda k, o=offsets: self.clause(o[k]), size)
+
+            kb.clauses[functor] = clauses
+            kb.templates[functor] = LazyList(lambda k, c=clauses: ClauseTemplate(c[k]),
+                                             size)
+            kb.fact_tables[functor] = bool(fact_table)
+            self._indexes[functor] = (index_pos, size)
+
+        return kb
+
+
+def save_snapshot(kb: KnowledgeBase, path: str) -> None:
+    """
+    Compiles a knowledge base into a snapshot file
+    """
+    data: bytes = SnapshotWriter(kb).encode()
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def load_snapshot(path: str) -> KnowledgeBase:
+    """
+    Opens the knowledge base of a snapshot file
+    """
+    return Snapshot(path).knowledge_base()
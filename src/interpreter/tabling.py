@@ -0,0 +1,65 @@
+"""
+Module to represent answer tables for tabled predicates.
+A call to a tabled predicate is evaluated once per variant,
+its answers are stored and reused by every later variant call
+"""
+
+from typing import Dict, Hashable, List, Union
+
+from src.interpreter.terms import Variable, PList, Term, Predicate
+from src.interpreter.templates import ClauseTemplate
+
+Variant = Hashable
+
+
+def variant_term(t: Term, numbering: Dict[Variable, int]) -> Variant:
+    """
+    Returns a key of a term which is the same for all of its variants,
+    i.e. the terms equal to it up to the renaming of variables
+    """
+    match t:
+        case Variable():
+            if t not in numbering:
+                numbering[t] = len(numbering)
+            return ('$VAR', numbering[t])
+        case PList():
+            return tuple(variant_term(e, numbering) for e in t.elements)
+        case _:
+            return t # Atom
+
+
+def variant_key(p: Predicate) -> Variant:
+    """
+    Returns a key of a predicate which is the same for all of its variants
+    """
+    return (p.name, variant_term(p.arguments, {}))
+
+
+class AnswerTable:
+    """
+    The answers found so far for a variant of a tabled call
+    """
+    def __init__(self) -> None:
+        self.answers: List[ClauseTemplate] = [] # so that each use gets its own variables
+        self.keys: set = set() # variants of the answers, to skip duplicates
+        self.complete: bool = False # no more answers can be found
+        self.evaluating: bool = False # the call is being evaluated right now
+        self.evaluated_in: Union[int, None] = None # the last fixpoint iteration
+
+    def add(self, answer: Predicate) -> bool:
+        """
+        Adds an answer to the table
+        :Returns: whether the answer was new
+        """
+        key: Variant = variant_key(answer)
+        if key in self.keys:
+            return False
+
+        self.keys.add(key)
+        self.answers.append(ClauseTemplate(Predicate(answer.name,
+                                                     answer.arguments)))
+        return True
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
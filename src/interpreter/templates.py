@@ -0,0 +1,291 @@
+"""
+Module to represent precompiled clause templates.
+The variables of a clause are numbered once, when it is added to
+the knowledge base, so that every call can standardize the clause apart
+by allocating a flat frame of slots instead of deep copying its terms.
+The head of a template is compiled into a matcher, with a step per
+argument specialized to the shape of the argument
+"""
+
+from typing import Callable, Dict, List, Set, Tuple, Union
+
+from src.interpreter.terms import Atom, Variable, PList, Term,\
+                                  Predicate, Conjunction,\
+                                  Fact, Rule
+from src.interpreter.unification import Substitution, deref, unify_into
+
+# An activation of a template, what each slot stands for in the current call
+# Slots are None until their first occurrence is reached
+Frame = List[Union[Term, None]]
+
+# Matches an argument of a goal, filling the frame and
+# binding the variables of the goal in the substitution
+ArgMatcher = Callable[[Term, Frame, Substitution], bool]
+# The same for all the arguments of a goal at once
+HeadMatcher = Callable[[Tuple[Term, ...], Frame, Substitution], bool]
+
+
+class Slot:
+    """
+    A numbered variable of a clause template
+    """
+    __slots__ = ('index', 'name')
+
+    def __init__(self, index: int, name: str) -> None:
+        self.index: int = index
+        self.name: str = name
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return "Slot(" + str(self.index) + ", " + self.name + ")"
+
+
+class TemplateList(PList):
+    """
+    A list of a template which contains slots
+    Lists without slots stay plain PLists and are shared between all calls
+    """
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "Template" + super().__repr__()
+
+
+class ClauseTemplate:
+    """
+    A clause with its variables replaced by numbered slots
+    """
+    __slots__ = ('names', 'head', 'body', '_matcher')
+
+    def __init__(self, clause: Union[Fact, Rule]) -> None:
+        numbering: Dict[Variable, Slot] = {}
+
+        if isinstance(clause, Rule):
+            self.head: Predicate = self._compile_predicate(clause.head, numbering)
+            self.body: Tuple[Predicate, ...] = tuple(self._compile_predicate(p, numbering)
+                                                     for p
+                                                     in clause.tail)
+        else:
+            self.head: Predicate = self._compile_predicate(clause, numbering)
+            self.body: Tuple[Predicate, ...] = ()
+
+        # the variable names, by slot
+        self.names: Tuple[str, ...] = tuple(slot.name for slot in numbering.values())
+        self._matcher: Union[HeadMatcher, None] = None # compiled on the first call
+
+    @staticmethod
+    def ground(fact: Fact) -> "ClauseTemplate":
+        """
+        Returns the template of a fact without variables, which is the fact itself
+        """
+        template: ClauseTemplate = object.__new__(ClauseTemplate)
+        template.head = fact
+        template.body = ()
+        template.names = ()
+        template._matcher = None
+
+        return template
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the number of slots of the template
+        """
+        return len(self.names)
+
+    def _compile_term(self,
+                      t: Term,
+                      numbering: Dict[Variable, Slot]) -> Union[Term, Slot]:
+        match t:
+            case Variable():
+                if t not in numbering:
+                    numbering[t] = Slot(len(numbering), t.name)
+                return numbering[t]
+            case PList():
+                elems: List[Union[Term, Slot]] = [self._compile_term(e, numbering)
+                                                  for e
+                                                  in t.elements]
+                if any(isinstance(e, (Slot, TemplateList)) for e in elems):
+                    return TemplateList(elems)
+                return t # ground, shared as it is
+            case _:
+                return t # Atom
+
+    def _compile_predicate(self,
+                           p: Predicate,
+                           numbering: Dict[Variable, Slot]) -> Predicate:
+        args: PList = self._compile_term(p.arguments, numbering)
+        if args is p.arguments:
+            return p # ground, shared as it is
+
+        return type(p)(p.name, args)
+
+    def frame(self) -> Frame:
+        """
+        Allocates the frame for a new activation of the clause
+        """
+        return [None] * len(self.names)
+
+    @staticmethod
+    def build_term(t: Union[Term, Slot], frame: Frame) -> Term:
+        """
+        Builds a term of the template for the activation given by the frame
+        Slots which are still empty are filled with fresh variables
+        """
+        match t:
+            case Slot():
+                val: Union[Term, None] = frame[t.index]
+                if val is None:
+                    val = frame[t.index] = Variable(t.name)
+                return val
+            case TemplateList():
+                return PList([ClauseTemplate.build_term(e, frame) for e in t.elements])
+            case _:
+                return t # ground
+
+    @staticmethod
+    def build_predicate(p: Predicate, frame: Frame) -> Predicate:
+        """
+        Builds a predicate of the template for the activation given by the frame
+        """
+        if not isinstance(p.arguments, TemplateList):
+            return p
+
+        return type(p)(p.name, ClauseTemplate.build_term(p.arguments, frame))
+
+    @property
+    def match(self) -> HeadMatcher:
+        """
+        Returns the matcher of the head: given the arguments of a goal,
+        a new frame and an empty substitution, it unifies the head with them,
+        filling the frame and binding the variables of the goal
+        The arity is not checked, the goal has the arity of the clause
+        """
+        if self._matcher is None:
+            self._matcher = compile_head(self.head)
+
+        return self._matcher
+
+    def build_body(self, frame: Frame) -> Conjunction:
+        """
+        Builds the body of the template for the activation given by the frame
+        """
+        return Conjunction([self.build_predicate(p, frame) for p in self.body])
+
+    def instantiate(self) -> Tuple[Predicate, Conjunction]:
+        """
+        Returns a copy of the clause with fresh variables
+        """
+        frame: Frame = self.frame()
+
+        return self.build_predicate(self.head, frame),\
+               Conjunction([self.build_predicate(p, frame) for p in self.body])
+
+
+def _match_atom(atom: Atom) -> ArgMatcher:
+    def match(arg: Term, frame: Frame, subs: Substitution) -> bool:
+        arg = deref(arg, subs)
+        if arg is atom:
+            return True
+
+        if isinstance(arg, Variable):
+            subs[arg] = atom
+            return True
+
+        return False
+
+    return match
+
+
+def _match_first(index: int) -> ArgMatcher:
+    def match(arg: Term, frame: Frame, subs: Substitution) -> bool:
+        frame[index] = arg
+        return True
+
+    return match
+
+
+def _match_repeated(index: int) -> ArgMatcher:
+    def match(arg: Term, frame: Frame, subs: Substitution) -> bool:
+        val: Term = frame[index]
+        return val is arg or unify_into(val, arg, subs)
+
+    return match
+
+
+def _match_ground(plist: PList) -> ArgMatcher:
+    def match(arg: Term, frame: Frame, subs: Substitution) -> bool:
+        return arg is plist or unify_into(plist, arg, subs)
+
+    return match
+
+
+def _match_list(t: TemplateList, elements: List[ArgMatcher]) -> ArgMatcher:
+    def match(arg: Term, frame: Frame, subs: Substitution) -> bool:
+        arg = deref(arg, subs)
+        if isinstance(arg, PList):
+            if len(arg) != len(elements):
+                return False
+            for elem, a in zip(elements, arg.elements):
+                if not elem(a, frame, subs):
+                    return False
+            return True
+
+        if isinstance(arg, Variable):
+            return unify_into(arg, ClauseTemplate.build_term(t, frame), subs)
+
+        return False
+
+    return match
+
+
+def compile_arg(t: Union[Term, Slot], seen: Set[int]) -> ArgMatcher:
+    """
+    Compiles the matcher of an argument of a head,
+    seen holds the slots which occur in the arguments before it
+    """
+    match t:
+        case Slot():
+            if t.index in seen:
+                return _match_repeated(t.index)
+            seen.add(t.index)
+            return _match_first(t.index)
+        case TemplateList():
+            return _match_list(t, [compile_arg(e, seen) for e in t.elements])
+        case PList():
+            return _match_ground(t)
+        case _:
+            return _match_atom(t)
+
+
+def compile_head(head: Predicate) -> HeadMatcher:
+    """
+    Compiles the matcher of the head of a template
+    The usual arities get a matcher without a loop
+    """
+    seen: Set[int] = set()
+    args: Tuple[ArgMatcher, ...] = tuple(compile_arg(arg, seen)
+                                         for arg in head.arguments.elements)
+
+    match args:
+        case ():
+            return lambda goal, frame, subs: True
+        case (first,):
+            return lambda goal, frame, subs: first(goal[0], frame, subs)
+        case (first, second):
+            return lambda goal, frame, subs: first(goal[0], frame, subs)\
+                                             and second(goal[1], frame, subs)
+        case (first, second, third):
+            return lambda goal, frame, subs: first(goal[0], frame, subs)\
+                                             and second(goal[1], frame, subs)\
+                                             and third(goal[2], frame, subs)
+
+    def match(goal: Tuple[Term, ...], frame: Frame, subs: Substitution) -> bool:
+        for arg, a in zip(args, goal):
+            if not arg(a, frame, subs):
+                return False
+        return True
+
+    return match
@@ -2,14 +2,22 @@
 Module to represent terms and clauses
 """
 
-from typing import List, Union, Dict
+import re
+import sys
+from typing import Iterable, Iterator, Tuple, Union, Dict
+from weakref import WeakValueDictionary
 
 class Variable:
     """
     Class for first order variables
     """
+    __slots__ = ('name', 'binding')
+
     def __init__(self, name: str) -> None:
         self.name: str = name
+        # the term the variable is bound to in place, by the resolution machine
+        # None while the variable is free
+        self.binding: Union["Term", None] = None
 
     def __eq__(self, o: object) -> bool:
         if isinstance(o, Variable):
@@ -30,25 +38,41 @@ class Variable:
 class Atom:
     """
     Class for first order atoms a.k.a. symbols
+    Atoms are interned: there is a single Atom object per symbol,
+    quoted and unquoted spellings of a name give the same object,
+    so atoms are compared by identity
+    The symbol table only holds atoms weakly, an atom no term refers to
+    any more is dropped from it, so it does not grow for the life of the process
     """
-    def __init__(self, name: str) -> None:
-        self.name: str = name
+    __slots__ = ('name', 'text', '__weakref__')
 
-    def __eq__(self, o: object) -> bool:
-        if isinstance(o, Atom):
-            return self.name == o.name\
-                   or self.name == Atom.quoted(o.name)\
-                   or self.quoted(self.name) == o.name
+    # the symbol table, by unquoted name
+    symbols: "WeakValueDictionary[str, Atom]" = WeakValueDictionary()
+    PLAIN: re.Pattern = re.compile(r'[a-z][A-Za-z0-9_]*|[1-9][0-9]*|0')
 
-        return False
+    def __new__(cls, name: str) -> "Atom":
+        name = Atom.unquoted(name)
+        atom: Atom = cls.symbols.get(name)
+
+        if atom is None:
+            atom = super().__new__(cls)
+            atom.name = sys.intern(name)
+            # the printed form, quoted only when needed
+            atom.text = name if Atom.PLAIN.fullmatch(name) else Atom.quoted(name)
+            atom = cls.symbols.setdefault(name, atom)
+
+        return atom
+
+    def __reduce__(self) -> tuple:
+        return (Atom, (self.name,)) # copies are interned again
 
     def __hash__(self) -> int:
         return hash(self.name)
 
     def __str__(self) -> str:
-        return self.name
+        return self.text
     def __repr__(self) -> str:
-        return "Atom(" + self.name + ")"
+        return "Atom(" + self.text + ")"
 
     @staticmethod
     def quoted(name: str) -> str:
@@ -57,21 +81,65 @@ class Atom:
         """
         return "'" + name + "'"
 
+    @staticmethod
+    def unquoted(name: str) -> str:
+        """
+        removes the quotes of a quoted string
+        """
+        if len(name) > 1 and name[0] == "'" and name[-1] == "'":
+            return name[1:-1]
+
+        return name
+
 class PList:
     """
     Class for first order predicate lists
     Usually used as arguments to predicates
+    Lists are immutable, their elements are kept in a tuple,
+    so ground lists can be shared between terms
+    Whether a list is ground and its hash are found once,
+    when they are first needed
     """
+    __slots__ = ('elements', '_ground', '_hash')
+
     def __init__(self,
-                 elements: List[Union[Atom, Variable, "PList"]]) -> None:
-        self.elements: List[Union[Atom, Variable, "PList"]] = elements
+                 elements: Iterable[Union[Atom, Variable, "PList"]]) -> None:
+        self.elements: Tuple[Union[Atom, Variable, "PList"], ...] = tuple(elements)
+        self._ground: Union[bool, None] = None
+        self._hash: Union[int, None] = None
+
+    @property
+    def ground(self) -> bool:
+        """
+        Returns whether the list has no variables
+        """
+        if self._ground is None:
+            self._ground = all(isinstance(e, Atom) or isinstance(e, PList) and e.ground
+                               for e in self.elements)
+
+        return self._ground
 
     def __eq__(self, o: object) -> bool:
+        if self is o:
+            return True
+
         if isinstance(o, PList):
+            if self.ground and o.ground and hash(self) != hash(o):
+                return False # ground lists with different hashes differ
             return self.elements == o.elements
 
         return False
 
+    def __hash__(self) -> int:
+        if self._hash is None:
+            # lists are equal when their variables have the same names,
+            # so variables are hashed by name here, not by identity
+            self._hash = hash(self.elements) if self.ground\
+                         else hash(tuple(e.name if isinstance(e, Variable) else e
+                                         for e in self.elements))
+
+        return self._hash
+
     def __contains__(self,
                      item: Union[Atom, Variable, "PList"]) -> bool:
         for e in self.elements:
@@ -84,12 +152,12 @@ class PList:
                     if e is item:
                         return True
                 case _: # Atom
-                    if e == item:
+                    if e is item:
                         return True
 
         return False
 
-    def __iter__(self) -> List[Union[Atom, Variable, "PList"]]:
+    def __iter__(self) -> Iterator[Union[Atom, Variable, "PList"]]:
         return iter(self.elements)
 
     def __len__(self) -> int:
@@ -106,15 +174,18 @@ class PList:
                                         in self.elements]) + '])'
 
 Term = Union[Atom, Variable, PList]
+Functor = Tuple[str, int] # name/arity, predicates are keyed by it
 
 class Predicate:
     """
     Class for first order predicate literals
     """
+    __slots__ = ('name', 'arguments')
+
     def __init__(self,
                  name: str,
                  arguments: PList) -> None:
-        self.name: str = name
+        self.name: str = sys.intern(name) # predicate symbols are compared by identity
         self.arguments: PList = arguments
 
     def __eq__(self, o: object) -> bool:
@@ -129,6 +200,13 @@ class Predicate:
         """
         return len(self.arguments)
 
+    @property
+    def functor(self) -> Functor:
+        """
+        Returns the name/arity of the predicate
+        """
+        return (self.name, len(self.arguments))
+
     def __str__(self) -> str:
         return self.name + str(self.arguments)
 
@@ -140,6 +218,8 @@ class NfPredicate(Predicate):
     """
     To support negation as failure
     """
+    __slots__ = ()
+
     def __eq__(self, o: object) -> bool:
         if isinstance(o, NfPredicate):
             return super().__eq__(o)
@@ -161,9 +241,11 @@ class Conjunction:
     Conjuctions represent rule tails
     Conjuctions represent also queries
     """
+    __slots__ = ('predicates',)
+
     def __init__(self,
-                 predicates: List[Predicate]) -> None:
-        self.predicates: List[Predicate] = predicates
+                 predicates: Iterable[Predicate]) -> None:
+        self.predicates: Tuple[Predicate, ...] = tuple(predicates)
 
     @property
     def variables(self) -> Dict[str, Variable]:
@@ -172,11 +254,14 @@ class Conjunction:
         """
 
         b_vars: Dict[str, Variable] = {}
+        stack: list = [predicate.arguments for predicate in reversed(self.predicates)]
 
-        for predicate in self.predicates:
-            for arg in predicate.arguments:
-                if isinstance(arg, Variable) and not arg.name == '_':
-                    b_vars[arg.name] = arg # if adding list support, change this
+        while stack: # in order of appearance, lists included
+            arg: Union[Atom, Variable, PList] = stack.pop()
+            if isinstance(arg, PList):
+                stack.extend(reversed(arg.elements))
+            elif isinstance(arg, Variable) and not arg.name == '_':
+                b_vars[arg.name] = arg
 
         return b_vars
 
@@ -197,7 +282,7 @@ class Conjunction:
 
         return False
 
-    def __iter__(self) -> List[Predicate]:
+    def __iter__(self) -> Iterator[Predicate]:
         return iter(self.predicates)
 
     def __getitem__(self, index: int) -> Predicate:
@@ -214,6 +299,8 @@ class Rule:
     """
     Rules are made of a head and a tail
     """
+    __slots__ = ('head', 'tail')
+
     def __init__(self,
                  head: Predicate,
                  tail: Conjunction) -> None:
@@ -233,6 +320,13 @@ class Rule:
         """
         return self.head.name
 
+    @property
+    def functor(self) -> Functor:
+        """
+        Returns the name/arity of the rule's head
+        """
+        return self.head.functor
+
     def __str__(self) -> str:
         return str(self.head) + " :- " + str(self.tail)
 
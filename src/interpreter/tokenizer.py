@@ -2,15 +2,19 @@
 Module for the tokenizer class
 """
 import re
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
+
+Token = Tuple[str, str] # type of the token, text of the token
 
 class Tokenizer:
     """
     Simple lexer for Prolog-style syntax.
     """
-    COMMENT: str = r'%[^\n]*|/\*(.|\n)*?\*/'
+    COMMENT: str = r'%[^\n]*|/\*[\s\S]*?\*/'
     KEYWORDS: List[str] = ['not', 'true']
     PATTERNS: List[Tuple[str, str]] = [
+                                        # the most frequent match, tried first
+                                        (r'\s+', 'WHITESPACE'),
                                         (r'\'[^\']*\'', 'QUOTED_ATOM'),
                                         (r'\_', 'WILDCARD'),
                                         (r'[A-Z_][A-Za-z0-9_]*', 'VARIABLE'),
@@ -28,35 +32,65 @@ class Tokenizer:
                                         (r'\]', 'RBRACKET'),
                                         # for potential list support
                                         (r'\|', 'PIPE'),
-                                        (r'\s+', 'WHITESPACE'),
+                                        # for predicate indicators name/arity
+                                        (r'/', 'SLASH'),
                                     ]
+    SKIPPED: Tuple[str, ...] = ('WHITESPACE', 'COMMENT')
+    # a single precompiled scanner for all token types, comments included
+    REGEX: re.Pattern = re.compile('|'.join(f'(?P<{name}>{pattern})'
+                                            for pattern, name
+                                            in [(COMMENT, 'COMMENT')] + PATTERNS))
+
     def __init__(self) -> None:
-        self.tokens: List[Tuple[str, str]] = []
+        self.tokens: List[Token] = []
+        self._source: str = ""
+        self._start: int = 0 # index of the first character of the last token scanned
 
-    def tokenize(self, source_code: str) -> None:
+    @property
+    def line(self) -> int:
         """
-        Tokenizes the source code
+        Returns the line of the last token scanned
         """
-        self.tokens = []
-        source_code: str = re.sub(Tokenizer.COMMENT, '', source_code) # remove comments
+        return self._source.count('\n', 0, self._start) + 1
 
-        combined: str = '|'.join(f'(?P<{name}>{pattern})'
-                                          for pattern, name
-                                          in Tokenizer.PATTERNS)
+    @property
+    def column(self) -> int:
+        """
+        Returns the column of the last token scanned
+        """
+        return self._start - self._source.rfind('\n', 0, self._start)
 
-        regex = re.compile(combined)
+    def scan(self, source_code: str) -> Iterator[Token]:
+        """
+        Lazily scans the source code in a single pass,
+        skipping whitespace and comments
+        The position of a token is only computed when it is asked for
+        """
+        skipped: Tuple[str, ...] = Tokenizer.SKIPPED
+        self._source = source_code
+        self._start = 0
+        i: int = 0 # where the next token should start
 
-        i: int = 0
+        for match in Tokenizer.REGEX.finditer(source_code):
+            if match.start() != i:
+                break # the scanner skipped over characters it could not match
 
-        while i < len(source_code):
-            match = regex.match(source_code, i)
-            if match is None:
-                raise ValueError(f'Invalid syntax: {source_code[i:]}')
+            token_type: str = match.lastgroup
+            if token_type not in skipped:
+                self._start = i
+                yield (token_type, match.group())
 
             i = match.end()
-            token_type: str = match.lastgroup
-            token_value: str = match.group(token_type)
 
-            if token_type != 'WHITESPACE':
-                self.tokens.append((token_type, token_value))
-    
\ No newline at end of file
+        if i < len(source_code):
+            self._start = i
+            raise ValueError(f'Invalid syntax at line {self.line}, '
+                             + f'column {self.column}: '
+                             + source_code[i:i + 20].split('\n')[0])
+
+    def tokenize(self, source_code: str) -> None:
+        """
+        Tokenizes the source code
+        """
+        self.tokens = list(self.scan(source_code))
+
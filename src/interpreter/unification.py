@@ -1,10 +1,9 @@
 """
 Module to represent the unification algorithm
 """
-from typing import Dict, List, Union
-from functools import reduce
+from typing import Dict, List, Tuple, Union
 
-from src.interpreter.terms import Atom, Variable,\
+from src.interpreter.terms import Variable,\
                                   PList, Predicate, Term,\
                                   Conjunction,\
                                   NfPredicate
@@ -29,8 +28,10 @@ class SubstitutionApplicator:
         match t:
             case Variable():
                 val: Term = self.subs.get(t)
-                return self.sub_term(val) if val else t
+                return self.sub_term(val) if val is not None else t
             case PList():
+                if t.ground:
+                    return t # nothing to substitute, shared as it is
                 elems: List[Term] = [self.sub_term(e) for e in t.elements]
                 return PList(elems)
             case _:
@@ -85,118 +86,98 @@ class SubstitutionApplicator:
         return sub
 
 
-def occurs_check(var: Variable,
-                 term: Term) -> bool:
+def deref(t: Term, subs: Substitution) -> Term:
     """
-    Checks if a variable occurs in a term
+    Follows the bindings of a variable in a substitution
     """
+    while isinstance(t, Variable):
+        val: Union[Term, None] = subs.get(t)
+        if val is None:
+            return t
+        t = val
 
-    match term:
-        case Variable():
-            return var is term
-        case PList():
-            return any(occurs_check(var, t) for t in term.elements)
-        case _:
-            return False
+    return t
 
 
-def unify(t1: Union[Term, Predicate, Conjunction],
-          t2: Union[Term, Predicate, Conjunction]) -> Union[Substitution, None]:
+def occurs_check(var: Variable,
+                 term: Term,
+                 subs: Substitution) -> bool:
     """
-    Finds the most general unifier of two terms
+    Checks if a variable occurs in a term, under a substitution
     """
+    stack: List[Term] = [term]
+    while stack:
+        t: Term = deref(stack.pop(), subs)
+        if t is var:
+            return True
+        if isinstance(t, PList) and not t.ground:
+            stack.extend(t.elements)
 
-    # This could've been implemented with abstract classes
-    # But the algorithm translates more clearly this way
-
-    match t1, t2:
-        case Atom(), Atom():
-            return {} if t1 == t2 else None
-
-        case Variable(), _:
-            return unify_variable(t1, t2)
-
-        case _, Variable():
-            return unify_variable(t2, t1)
-
-        case PList(), PList():
-            return unify_list(t1, t2)
+    return False
 
-        case Predicate(), Predicate():
-            return unify_predicate(t1, t2)
 
-        case Conjunction(), Conjunction():
-            return unify_conjunction(t1, t2)
-
-        case _:
-            return None
-
-
-def unify_variable(var: Variable,
-                   term: Term) -> Union[Substitution, None]:
+def unify(t1: Union[Term, Predicate, Conjunction],
+          t2: Union[Term, Predicate, Conjunction]) -> Union[Substitution, None]:
     """
-    Unifies a variable with a term
+    Finds the most general unifier of two terms
+    The unifier is triangular: a variable may be bound to a term
+    with variables bound further on, SubstitutionApplicator follows them
     """
-    if var is term:
-        return {} # Trivial case, identity substitution
-
-    if occurs_check(var, term):
-        return None # Occurs check failed
-
     subs: Substitution = {}
-    subs[var] = term
 
-    return subs
+    return subs if unify_into(t1, t2, subs) else None
 
 
-def unify_list(l1: PList,
-               l2: PList) -> Union[Substitution, None]:
+def unify_into(t1: Union[Term, Predicate, Conjunction],
+               t2: Union[Term, Predicate, Conjunction],
+               subs: Substitution) -> bool:
     """
-    Unifies two lists
+    Extends a substitution with a unifier of two terms under it
+    The terms are walked once, pair by pair, dereferencing variables
+    through subs and binding them in it, until the first pair which does not unify
+    subs is changed in place, and is left partly extended on failure
+    :Returns: whether the terms unify
     """
-    if len(l1.elements) != len(l2.elements):
-        return None
-
-    subs: List[Substitution] = [unify(t1, t2)
-                                for t1, t2
-                                in zip(l1.elements, l2.elements)]
-
-    if any(s is None for s in subs):
-        return None
-
-    return reduce(SubstitutionApplicator.compose, subs, {}) # Compose all substitutions
-
-
-
-def unify_predicate(p1: Predicate,
-                    p2: Predicate) -> Union[Substitution, None]:
-    """
-    Unifies two predicates
-    """
-    if p1.name != p2.name:
-        return None
-
-    if len(p1.arguments) != len(p2.arguments):
-        return None
-
-
-    return unify_list(p1.arguments, p2.arguments)
-
-
-def unify_conjunction(c1: Conjunction,
-                      c2: Conjunction) -> Union[Substitution, None]:
-    """
-    Unifies two conjunctions
-    """
-    if len(c1) != len(c2):
-        return None
-
-    subs: List[Substitution] = [unify(p1, p2) # Unify predicates
-                                for p1, p2
-                                in zip(c1, c2)]
-
-
-    if any(s is None for s in subs):
-        return None
-
-    return reduce(SubstitutionApplicator.compose, subs, {}) # Compose all substitutions
+    stack: List[Tuple[object, object]] = [(t1, t2)]
+
+    while stack:
+        a, b = stack.pop()
+        a = deref(a, subs)
+        b = deref(b, subs)
+
+        if a is b: # atoms are interned
+            continue
+
+        if isinstance(a, Variable):
+            if occurs_check(a, b, subs):
+                return False
+            subs[a] = b
+
+        elif isinstance(b, Variable):
+            if occurs_check(b, a, subs):
+                return False
+            subs[b] = a
+
+        elif isinstance(a, PList) and isinstance(b, PList):
+            if a.ground and b.ground: # nothing to bind, they are either equal or not
+                if a != b:
+                    return False
+            elif len(a.elements) != len(b.elements):
+                return False
+            else: # the pairs are popped left to right
+                stack.extend(zip(reversed(a.elements), reversed(b.elements)))
+
+        elif isinstance(a, Predicate) and isinstance(b, Predicate):
+            if a.name != b.name:
+                return False
+            stack.append((a.arguments, b.arguments))
+
+        elif isinstance(a, Conjunction) and isinstance(b, Conjunction):
+            if len(a) != len(b):
+                return False
+            stack.extend(zip(reversed(a.predicates), reversed(b.predicates)))
+
+        else:
+            return False # distinct atoms, or terms of different kinds
+
+    return True
@@ -0,0 +1,75 @@
+import pytest
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.monitor import Limits
+from src.interpreter.datalog import DatalogEngine
+from src.interpreter.prolog_parser import PrologParser
+
+program = """parent(hamish, john).
+             parent(john, rosie).
+             parent(mary, rosie).
+             parent(mary, anne).
+             person(X) :- parent(X, Y).
+             person(Y) :- parent(X, Y).
+             ancestor(X, Y) :- parent(X, Y).
+             ancestor(X, Y) :- ancestor(X, Z), parent(Z, Y).
+             sibling(X, Y) :- parent(Z, X), parent(Z, Y), not(same(X, Y)).
+             same(X, X) :- person(X).
+             only_child(X) :- person(X), not(sibling(X, _)).
+          """
+
+
+def test_closure():
+    kb = PrologParser(program).parse_program()
+    engine = DatalogEngine(kb)
+    goal = PrologParser("ancestor(hamish, Y).").parse_goal()
+
+    assert [str(sol) for sol in engine.solve(goal)] == ["ancestor[hamish, john]",
+                                                        "ancestor[hamish, rosie]"]
+    assert len(engine.relation(("ancestor", 2))) == 5
+
+
+def test_stratified_negation():
+    prolog: Interpreter = Interpreter(engine='datalog')
+    prolog.load_base(program)
+
+    exp = """true.
+             X = rosie, Y = anne
+             true.
+             X = anne, Y = rosie"""
+
+    assert prolog.answer("sibling(X, Y).").split() == exp.split()
+    assert prolog.answer("only_child(rosie).") == "false."
+    assert prolog.answer("only_child(john).").split() == ["true."]
+
+    with pytest.raises(ValueError):
+        prolog.answer("uncle(X, Y).")
+
+
+def test_not_datalog():
+    for src in ["p(X) :- q(Y).\nq(a).",
+                "p(X).",
+                "p([a]) :- q(a).\nq(a).",
+                "p(X) :- q(X), not(p(X)).\nq(a)."]:
+        engine = DatalogEngine(PrologParser(src).parse_program())
+        with pytest.raises(ValueError):
+            engine.materialize()
+
+
+def test_stopped_materialization_is_dropped():
+    edges = "".join(f"edge(n{i}, n{i + 1}).\n" for i in range(60))
+    prolog: Interpreter = Interpreter(engine='datalog')
+    prolog.load_base(edges + """path(X, Y) :- edge(X, Y).
+                                path(X, Y) :- path(X, Z), edge(Z, Y).""")
+
+    assert prolog.answer("path(n0, X).", Limits(inferences=300)).strip()\
+                 .endswith("Limit reached: 300 inferences.")
+    assert len(list(prolog.answers("path(n0, X)."))) == 60
+
+
+def test_undefined_predicate():
+    for engine in Interpreter.ENGINES:
+        prolog: Interpreter = Interpreter(engine=engine)
+        prolog.load_base("r(X) :- q(X).\np(a).")
+
+        with pytest.raises(ValueError, match="No such predicate: q"):
+            prolog.answer("r(X).")
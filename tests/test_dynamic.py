@@ -0,0 +1,138 @@
+import time
+import pytest
+from src.interpreter.knowledge_base import KnowledgeBase
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.prolog_parser import PrologParser
+
+
+def test_assert_retract_methods():
+    kb = PrologParser("p(a, x).\np(b, y).\np(X, z).").parse_program()
+
+    kb.asserta(PrologParser("p(c, x).").parse_fact())
+    kb.assertz(PrologParser("p(d, x).").parse_fact())
+    removed = kb.retract(PrologParser("p(b, Y).").parse_fact())
+
+    assert str(removed) == "p[b, y]"
+    assert kb.retract(PrologParser("p(e, w).").parse_fact()) is None
+    assert [str(c) for c in kb.clauses_of(("p", 2))] == ["p[c, x]", "p[a, x]", "p[X, z]", "p[d, x]"]
+
+    goal = PrologParser("p(Q, x).").parse_goal()
+    assert [str(sol) for sol in kb.answer_query(goal)] == ["p[c, x]", "p[a, x]", "p[d, x]"]
+
+    index = kb.indexes[("p", 2)]
+    assert list(index.candidates(PrologParser("p(a, W)").parse_predicate())) == [0, 2]
+    assert list(index.candidates(PrologParser("p(W, z)").parse_predicate())) == [2]
+
+
+def test_running_call_sees_retracted():
+    kb = PrologParser("p(a).\np(b).").parse_program()
+    kb.asserta(PrologParser("p(c).").parse_fact())
+    goal = PrologParser("p(W)").parse_predicate()
+
+    candidates = iter(kb.indexes[("p", 1)].candidates(goal))
+    assert next(candidates) == 2
+    kb.retract(PrologParser("p(a).").parse_fact())
+    assert list(candidates) == [0, 1]
+    assert list(kb.indexes[("p", 1)].candidates(goal)) == [2, 1]
+
+    kb.retract(PrologParser("p(c).").parse_fact()) # drops the removed clauses
+    assert kb.clauses[("p", 1)] == kb.clauses_of(("p", 1))
+    assert [str(c) for c in kb.clauses_of(("p", 1))] == ["p[b]"]
+
+
+def _update_time(size):
+    kb = KnowledgeBase()
+    kb.add_facts("p", ([str(i)] for i in range(size)))
+    facts = [PrologParser(f"p(new{i}).").parse_fact() for i in range(200)]
+
+    start = time.perf_counter()
+    for fact in facts:
+        kb.asserta(fact)
+    for fact in facts:
+        kb.retract(fact)
+    return time.perf_counter() - start
+
+
+def test_updates_do_not_scale_with_predicate_size():
+    small = min(_update_time(5000) for _ in range(3))
+    large = min(_update_time(20000) for _ in range(3))
+
+    assert large < 2 * small + 0.005 # copying the clauses would take four times as long
+
+
+def test_retract_only_matching_kind():
+    kb = PrologParser("p(a).\np(X) :- q(X).\nq(b).").parse_program()
+
+    assert kb.retract(PrologParser("p(b).").parse_fact()) is None
+    assert kb.retract(PrologParser("p(Y) :- q(Y).").parse_rule()) is not None
+    assert [str(c) for c in kb.clauses_of(("p", 1))] == ["p[a]"]
+
+
+def test_tables_follow_updates():
+    kb = PrologParser(":- table path/2.\n"
+                      "e(a, b).\n"
+                      "path(X, Y) :- path(X, Z), e(Z, Y).\n"
+                      "path(X, Y) :- e(X, Y).").parse_program()
+    goal = PrologParser("path(a, Y).").parse_goal()
+
+    assert len(list(kb.answer_query(goal))) == 1
+    kb.assertz(PrologParser("e(b, c).").parse_fact())
+    assert len(list(kb.answer_query(goal))) == 2
+    kb.retract(PrologParser("e(a, b).").parse_fact())
+    assert not list(kb.answer_query(goal))
+
+
+@pytest.mark.parametrize("engine", ["sld", "machine"])
+def test_builtins(engine):
+    interpreter = Interpreter(engine=engine)
+    interpreter.load_base("p(a).\np(b).\nq(X) :- p(X).")
+
+    assert interpreter.answer("asserta(p(z)), assertz((r(X) :- p(X), not(q(X))))."
+                              ) == "true.\nX = X\n"
+    assert interpreter.answer("retract(p(X)).") == "true.\nX = z\n"
+    assert interpreter.answer("retract((q(Y) :- p(Y))).").startswith("true.")
+    assert interpreter.answer("retract((q(Y) :- p(Y))).") == "false."
+    assert interpreter.answer("q(X).") == "false."
+
+    # clauses added while a goal runs are not seen by it
+    assert interpreter.answer("p(X), assertz(p(X)).") == "true.\nX = a\ntrue.\nX = b\n"
+    assert interpreter.answer("p(X).").count("true.") == 4
+
+
+@pytest.mark.parametrize("engine", ["sld", "machine"])
+def test_retract_while_running(engine):
+    interpreter = Interpreter(engine=engine)
+    interpreter.load_base("p(a).\np(b).\np(c).\np(d).")
+
+    # the running call keeps its clauses, even once the removed ones are dropped
+    assert interpreter.answer("p(X), retract(p(Y)).").count("true.") == 4
+    assert interpreter.answer("p(X).") == "false."
+
+
+def test_datalog_sees_updates():
+    interpreter = Interpreter(engine="datalog")
+    interpreter.load_base("e(a, b).\nr(X) :- e(X, Y).")
+
+    assert interpreter.answer("r(X).") == "true.\nX = a\n"
+    interpreter.kb.assertz(PrologParser("e(c, d).").parse_fact())
+    assert interpreter.answer("r(X).") == "true.\nX = a\ntrue.\nX = c\n"
+
+
+def test_interpreters_do_not_share_clauses():
+    first = Interpreter()
+    first.kb.assertz(PrologParser("p(a).").parse_fact())
+
+    assert ("p", 1) not in Interpreter().kb.clauses
+
+
+@pytest.mark.parametrize("engine", ["sld", "machine"])
+def test_predicates_named_like_builtins(engine):
+    interpreter = Interpreter(engine=engine)
+    interpreter.load_base("retract(a, b).\nassertz(X, Y, c) :- retract(X, Y).\nasserta.")
+
+    assert interpreter.answer("retract(X, Y).") == "true.\nX = a, Y = b\n"
+    assert interpreter.answer("assertz(a, Y, Z).") == "true.\nY = b, Z = c\n"
+    assert interpreter.answer("asserta.").split() == ["true."]
+    # the builtin still takes a clause of the user's predicate
+    assert interpreter.answer("retract(retract(a, b)).").split() == ["true."]
+    assert interpreter.answer("retract(X, Y).") == "false."
@@ -1,6 +1,6 @@
 import os
 import pytest
-from src.interpreter.interpreter import Interpreter
+from src.interpreter.interpreter import Answer, Interpreter
 
 def test_sample():
     prolog: Interpreter = Interpreter()
@@ -36,3 +36,16 @@ def test_longer_goal():
 
     with pytest.raises(ValueError):
         prolog.answer("ancestor.")
+
+
+def test_answer_records():
+    prolog: Interpreter = Interpreter()
+    prolog.load_base("num(a). num(b). num(c).")
+
+    answers = prolog.answers("num(X).")
+    first = next(answers)
+    assert first == Answer({"X": "a"})
+    assert str(first) == "true.\nX = a\n"
+    assert [a.bindings["X"] for a in answers] == ["b", "c"]
+
+    assert prolog.answer("num(d).") == "false."
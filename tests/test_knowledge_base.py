@@ -0,0 +1,77 @@
+import io
+import pytest
+from src.interpreter.knowledge_base import KnowledgeBase
+from src.interpreter.prolog_parser import PrologParser
+from src.interpreter.terms import Atom
+
+
+def test_lazy_answers():
+    kb = PrologParser("p(a).\np(X) :- p(X).").parse_program()
+    goal = PrologParser("p(Y).").parse_goal()
+
+    sols = kb.answer_query(goal) # infinitely many solutions
+
+    assert str(next(sols)) == "p[a]"
+    assert str(next(sols)) == "p[a]"
+
+
+def test_negation_stops_early():
+    kb = PrologParser("p(a).\np(X) :- p(X).\nq(b).").parse_program()
+    goal = PrologParser("q(X), not(p(a)).").parse_goal()
+
+    assert not list(kb.answer_query(goal))
+
+
+def test_index_candidates():
+    kb = PrologParser("p(a, b).\np(X, c).\np(b, c).\np(a, d).\np([a], e).").parse_program()
+
+    index = kb.indexes[("p", 2)]
+
+    assert list(index.candidates(PrologParser("p(a, Y)").parse_predicate())) == [0, 1, 3]
+    assert list(index.candidates(PrologParser("p(Z, d)").parse_predicate())) == [3]
+    assert list(index.candidates(PrologParser("p(Z, Y)").parse_predicate())) == [0, 1, 2, 3, 4]
+
+
+def test_indexed_query():
+    kb = PrologParser("p(a, b).\np(X, c).\np(b, c).\np('a', d).").parse_program()
+    goal = PrologParser("p(a, Y).").parse_goal()
+
+    assert [str(sol) for sol in kb.answer_query(goal)] == ["p[a, b]", "p[a, c]", "p[a, d]"]
+
+
+def test_bulk_facts():
+    kb = PrologParser("parent(X, Y) :- edge(X, Y).").parse_program()
+
+    assert kb.add_facts("edge", [("a", "b"), ("b", 1), ()]) == 2
+    assert kb.load_csv("edge", io.StringIO("from\tto\nc\t'd e'\n"),
+                       delimiter="\t", header=True) == 1
+
+    assert [str(f) for f in kb.clauses[("edge", 2)]] == ["edge[a, b]", "edge[b, 1]",
+                                                    "edge[c, 'd e']"]
+    assert kb.fact_tables[("edge", 2)]
+    assert kb.clauses[("edge", 2)][0].arguments.elements[0] is Atom("a")
+
+    goal = PrologParser("parent(b, Y).").parse_goal()
+    assert [str(sol) for sol in kb.answer_query(goal)] == ["parent[b, 1]"]
+
+
+def test_predicates_keyed_by_arity():
+    kb = PrologParser("foo(a).\nfoo(a, b, c).\nfoo(X, Y, Y).").parse_program()
+
+    assert len(kb.clauses[("foo", 1)]) == 1
+    assert len(kb.clauses[("foo", 3)]) == 2
+    assert kb.fact_tables[("foo", 1)] and not kb.fact_tables[("foo", 3)]
+
+    goal = PrologParser("foo(X)").parse_predicate()
+    assert [str(p) for p in kb.query_single(goal)] == ["foo[a]"]
+
+    with pytest.raises(ValueError, match=r"foo\\2"):
+        list(kb.query_single(PrologParser("foo(X, Y)").parse_predicate()))
+
+
+def test_bulk_facts_of_several_arities():
+    kb = KnowledgeBase()
+
+    assert kb.add_facts("edge", [("a", "b"), ("c",), ("d", "e")]) == 3
+    assert [str(f) for f in kb.clauses[("edge", 2)]] == ["edge[a, b]", "edge[d, e]"]
+    assert [str(f) for f in kb.clauses[("edge", 1)]] == ["edge[c]"]
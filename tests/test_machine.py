@@ -0,0 +1,72 @@
+import os
+import pytest
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.machine import Machine, ChoicePoint
+from src.interpreter.prolog_parser import PrologParser
+
+
+def test_same_answers():
+    path = os.path.join("sample", "family_relations.pl")
+
+    with open(path, "r", encoding="utf-8") as f:
+        src = f.read()
+
+    sld: Interpreter = Interpreter()
+    sld.load_base(src)
+    machine: Interpreter = Interpreter(engine='machine')
+    machine.load_base(src)
+
+    for query in ["ancestor(X, Y).", "sibling(X, Y).",
+                  "grandparent(hamish, Y).", "not(ancestor(hamish, jack))."]:
+        assert machine.answer(query) == sld.answer(query)
+
+    with pytest.raises(ValueError):
+        machine.answer("uncle(X, Y).")
+
+
+def test_deep_recursion():
+    n = 3000
+    src = "".join(f"parent(c{i}, c{i + 1}).\n" for i in range(n))
+    src += "ancestor(X, Y) :- parent(X, Y).\n"
+    src += "ancestor(X, Y) :- parent(X, Z), ancestor(Z, Y).\n"
+
+    kb = PrologParser(src).parse_program()
+    goal = PrologParser(f"ancestor(c0, c{n}).").parse_goal()
+
+    assert len(list(Machine(kb).solve(goal))) == 1
+
+
+def test_recursive_rule_variables():
+    kb = PrologParser("p(a, b).\np(b, c).\n"
+                      "path(X, Y) :- p(X, Y).\n"
+                      "path(X, Y) :- p(X, Z), path(Z, Y).").parse_program()
+    goal = PrologParser("path(a, Y).").parse_goal()
+
+    assert [str(sol) for sol in Machine(kb).solve(goal)] == ["path[a, b]", "path[a, c]"]
+
+
+def test_bindings_undone():
+    kb = PrologParser("p(a, b).\np(b, c).").parse_program()
+    goal = PrologParser("p(X, Y).").parse_goal()
+    machine = Machine(kb)
+
+    sols = machine.solve(goal)
+    next(sols)
+    assert goal.variables["X"].binding is not None
+
+    sols.close()
+    assert not machine.trail
+    assert all(var.binding is None for var in goal.variables.values())
+
+
+def test_choice_point_only_for_alternatives():
+    kb = PrologParser("p(a).\np(b).\n").parse_program()
+    machine = Machine(kb)
+    goal = PrologParser("p(X).").parse_goal()[0]
+    templates = iter(kb.templates[("p", 1)])
+    choices = []
+
+    machine._resolve(ChoicePoint(goal, 0, None, next(templates), templates, 0), choices)
+    assert len(choices) == 1 # p(b) is left
+    machine._backtrack(choices)
+    assert choices == [] # p(b) was the last clause
@@ -0,0 +1,139 @@
+import pytest
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.monitor import Limits, QueryMonitor, QueryStopped
+
+PROGRAM = """
+edge(a, b).
+edge(b, c).
+edge(c, a).
+path(X, Y) :- edge(X, Y).
+path(X, Y) :- edge(X, Z), path(Z, Y).
+"""
+
+
+@pytest.mark.parametrize("engine", Interpreter.ENGINES)
+def test_inferences_counted(engine):
+    intr = Interpreter(engine=engine)
+    intr.load_base(PROGRAM)
+    intr.answer("edge(a, X).")
+    assert intr.monitor.inferences > 0
+    assert intr.monitor.finished is not None
+
+
+@pytest.mark.parametrize("engine", ['sld', 'machine'])
+def test_stop_endless_query(engine):
+    intr = Interpreter(engine=engine)
+    intr.load_base(PROGRAM)
+    with pytest.raises(QueryStopped):
+        for i, _ in enumerate(intr.answers("path(a, X).")):
+            if i == 10:
+                intr.monitor.stop()
+            assert i < 20
+
+
+def test_stop_raises():
+    monitor = QueryMonitor()
+    monitor.infer()
+    monitor.stop()
+    with pytest.raises(QueryStopped):
+        monitor.infer()
+    assert monitor.inferences == 2
+    monitor.start()
+    monitor.infer()
+    assert monitor.inferences == 1
+
+
+def test_stop_before_start():
+    intr = Interpreter()
+    intr.monitor.stop() # e.g. while the program loads
+    intr.load_base(PROGRAM)
+    with pytest.raises(QueryStopped):
+        intr.answer("edge(a, X).")
+    assert intr.answer("edge(a, X).") == "true.\nX = b\n" # the stop was spent
+
+    intr.monitor.stop()
+    intr.monitor.clear_stop()
+    assert intr.answer("edge(a, X).") == "true.\nX = b\n"
+
+
+@pytest.mark.parametrize("engine", ['sld', 'machine'])
+def test_answer_limit(engine):
+    intr = Interpreter(engine=engine)
+    intr.load_base(PROGRAM)
+    res = intr.answer("path(a, X).", Limits(answers=4))
+    assert res.split() == ["true.", "X", "=", "b",
+                           "true.", "X", "=", "c",
+                           "true.", "X", "=", "a",
+                           "true.", "X", "=", "b",
+                           "Limit", "reached:", "4", "answers."]
+
+
+@pytest.mark.parametrize("engine", ['sld', 'machine'])
+def test_inference_limit(engine):
+    intr = Interpreter(engine=engine)
+    intr.load_base(PROGRAM)
+    res = intr.answer("path(a, X).", Limits(inferences=200))
+    assert res.endswith("Limit reached: 200 inferences.\n")
+    assert res.startswith("true.")
+    assert intr.monitor.inferences == 201
+
+
+@pytest.mark.parametrize("engine", ['sld', 'machine'])
+def test_depth_limit(engine):
+    intr = Interpreter(engine=engine)
+    intr.load_base(PROGRAM)
+    res = intr.answer("path(a, X).", Limits(depth=50))
+    assert res.endswith("Limit reached: depth 50.\n")
+
+
+def test_timeout():
+    intr = Interpreter(engine='machine')
+    intr.load_base(PROGRAM)
+    res = intr.answer("path(a, X).", Limits(timeout=0.05))
+    assert res.endswith("Limit reached: 0.05 s timeout.\n")
+    assert intr.monitor.elapsed < 5
+
+
+@pytest.mark.parametrize("engine", Interpreter.ENGINES)
+def test_answer_limit_edges(engine):
+    intr = Interpreter(engine=engine)
+    intr.load_base(PROGRAM)
+    assert intr.answer("edge(a, X).", Limits(answers=1)) == "true.\nX = b\n"\
+                                                            "Limit reached: 1 answers.\n"
+    assert intr.answer("edge(X, Y).", Limits(answers=0)) == "Limit reached: 0 answers.\n"
+    assert intr.answer("edge(X, d).", Limits(answers=0)) == "Limit reached: 0 answers.\n"
+    with pytest.raises(ValueError):
+        intr.answer("edge(a, X).", Limits(answers=-1))
+
+
+@pytest.mark.parametrize("engine", ['sld', 'machine'])
+def test_answer_limit_does_not_search_on(engine):
+    intr = Interpreter(engine=engine)
+    intr.load_base("q(a).\nq(X) :- r(X).\nr(X) :- r(X).\n")
+    assert intr.answer("q(X).", Limits(answers=1)) == "true.\nX = a\n"\
+                                                      "Limit reached: 1 answers.\n"
+
+
+@pytest.mark.parametrize("engine", ['sld', 'machine'])
+def test_depth_of_deterministic_recursion(engine):
+    intr = Interpreter(engine=engine)
+    intr.load_base("".join(f"next(n{i}, n{i + 1}).\n" for i in range(100))
+                   + "walk(n100).\nwalk(X) :- next(X, Y), walk(Y).\n")
+    assert intr.answer("walk(n0).", Limits(depth=50)) == "Limit reached: depth 50.\n"
+    assert intr.answer("walk(n0).", Limits(depth=150)).split() == ["true."]
+
+
+@pytest.mark.parametrize("engine", ['sld', 'machine'])
+def test_depth_of_answered_goals(engine):
+    intr = Interpreter(engine=engine)
+    # the goals of a body which have answered do not count towards the depth
+    intr.load_base("t.\n" + "".join(f"s{i} :- t.\n" for i in range(10))
+                   + "a :- " + ", ".join(f"s{i}" for i in range(10)) + ".\n")
+    assert intr.answer("a.", Limits(depth=3)).split() == ["true."]
+    assert intr.answer("a.", Limits(depth=1)) == "Limit reached: depth 1.\n"
+
+
+def test_no_limit_reached():
+    intr = Interpreter()
+    intr.load_base(PROGRAM)
+    assert intr.answer("edge(a, X).", Limits(answers=5, inferences=100)) == "true.\nX = b\n"
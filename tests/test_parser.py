@@ -135,3 +135,41 @@ def test_variable_equality():
 
     assert v1 == v2 and v1 != v3
     assert hash(v1) != hash(v2) and hash(v1) != hash(v3)
+
+
+def test_shared_ground_lists():
+    kb = PrologParser("p([a, [b]], X).\nq([a, [b]]).\nr([X]).\nr([X]).").parse_program()
+
+    p_list = kb.clauses[("p", 2)][0].arguments.elements[0]
+    q_list = kb.clauses[("q", 1)][0].arguments.elements[0]
+    r1, r2 = kb.clauses[("r", 1)]
+
+    assert p_list is q_list
+    assert r1.arguments.elements[0] is not r2.arguments.elements[0]
+
+
+def test_streamed_tokens_released():
+    # the parser only holds the current token, the rest are not scanned yet
+    parser = PrologParser("p(a).\nq(b).\n$")
+    statements = parser.parse_statements()
+
+    assert str(next(statements)) == "p[a]"
+    assert parser.current == ("ATOM", "q") and parser.index == 5
+    assert parser.tokenizer.tokens == []
+    with pytest.raises(ValueError, match="Invalid syntax at line 3"):
+        list(statements)
+
+
+def test_predictive_clauses():
+    kb = PrologParser("p(X) :- q(X), r.\nq(a).\nr.\ns :- r.").parse_program()
+
+    assert isinstance(kb.clauses[("p", 1)][0], Rule)
+    assert isinstance(kb.clauses[("q", 1)][0], Fact)
+    assert isinstance(kb.clauses[("r", 0)][0], Fact)
+    assert isinstance(kb.clauses[("s", 0)][0], Rule)
+
+    with pytest.raises(ValueError, match="end of clause or implication. Got ATOM"):
+        PrologParser("p(a) q(b).").parse_program()
+
+    with pytest.raises(ValueError, match="Got EOF"):
+        PrologParser("p(a) :- q(a)").parse_program()
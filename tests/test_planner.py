@@ -0,0 +1,89 @@
+import pytest
+from src.interpreter.prolog_parser import PrologParser
+from src.interpreter.monitor import Limits, LimitReached
+
+program = """parent(hamish, john).
+             parent(john, rosie).
+             parent(rosie, jack).
+             parent(mary, rosie).
+             parent(mary, anne).
+             parent(anne, anne).
+             big(hamish).
+             big(john).
+             big(mary).
+             grandparent(X, Y) :- parent(X, Z), parent(Z, Y).
+          """
+
+
+def answers(kb, query):
+    return [str(sol) for sol in kb.answer_query(PrologParser(query).parse_goal())]
+
+
+def test_same_order_as_nested_loops():
+    kb = PrologParser(program).parse_program()
+
+    for query in ["parent(X, Z), parent(Z, Y).",
+                  "big(X), parent(X, Y), parent(Y, Z).",
+                  "parent(X, X), big(Y).",
+                  "grandparent(X, Y), parent(Y, Z).",
+                  "parent(mary, Y), parent(Y, Z), not(big(Z))."]:
+        kb.plan_joins = True
+        joined = answers(kb, query)
+        kb.plan_joins = False
+        assert joined == answers(kb, query)
+
+
+def test_fact_run():
+    kb = PrologParser(program).parse_program()
+
+    assert kb.planner.fact_run(PrologParser("grandparent(X, Y), big(X), big(Y).")
+                               .parse_goal(), 1) == 2
+
+
+def test_join_streams():
+    facts = "".join(f"n(i{i}). " for i in range(1000))
+    kb = PrologParser(facts).parse_program()
+    goals = list(PrologParser("n(X), n(Y), n(Z).").parse_goal())
+
+    kb.monitor.start()
+    solutions = kb.planner.join(goals)
+    first = next(solutions)
+    assert [str(first[var]) for var in goals[0].arguments] == ["i0"]
+    assert kb.monitor.inferences == 3 # a probe per goal, not the whole product
+
+    kb.monitor.start(Limits(inferences=100))
+    with pytest.raises(LimitReached):
+        sum(1 for _ in kb.planner.join(goals))
+
+
+def test_lists_never_match_facts():
+    kb = PrologParser("p(a). p(b). q(x, y).").parse_program()
+
+    for query in ["p([a]), p(X).", "p(X), q([a], Y)."]:
+        kb.plan_joins = True
+        assert answers(kb, query) == []
+        kb.plan_joins = False
+        assert answers(kb, query) == []
+
+
+def test_joins_do_not_rescan_facts():
+    facts = "".join(f"parent(p{i}, p{i + 1}). person(p{i}). " for i in range(500))
+    kb = PrologParser(facts + "gp(X, Y) :- parent(X, Z), parent(Z, Y).").parse_program()
+    reads = []
+
+    class CountedFacts(list):
+        def __getitem__(self, i):
+            reads.append(i)
+            return super().__getitem__(i)
+
+    kb.clauses[("parent", 2)] = CountedFacts(kb.clauses[("parent", 2)])
+
+    # a call with a bound argument looks its facts up, it does not hash them all
+    assert len(answers(kb, "person(P), gp(P, Y).")) == 499
+    assert len(reads) < 5 * 500
+
+    # the hash table of a join is kept for the next one
+    assert len(answers(kb, "parent(X, Z), parent(Z, Y).")) == 499
+    first = len(reads)
+    assert len(answers(kb, "parent(X, Z), parent(Z, Y).")) == 499
+    assert len(reads) - first <= 500
@@ -0,0 +1,45 @@
+import json
+import pytest
+from src.interpreter.interpreter import Interpreter
+
+PROGRAM = """
+parent(a, b).
+parent(b, c).
+parent(c, d).
+ancestor(X, Y) :- parent(X, Y).
+ancestor(X, Y) :- parent(X, Z), ancestor(Z, Y).
+"""
+
+
+def test_profile_counts():
+    intr = Interpreter()
+    intr.load_base(PROGRAM)
+    intr.start_profiling()
+    intr.answer("ancestor(a, X).")
+    report = intr.profile()
+
+    ancestor = report["predicates"]["ancestor/2"]
+    parent = report["predicates"]["parent/2"]
+    assert ancestor["calls"] == 4
+    assert ancestor["attempts"] == 8
+    assert ancestor["unifications"] == 8
+    assert parent["calls"] == 8
+    assert parent["failures"] == 2 # parent(d, Y), twice
+    assert ancestor["cumulative_time"] >= ancestor["self_time"] >= 0
+    assert report["inferences"] == intr.monitor.inferences
+    assert report["inferences_per_second"] > 0
+
+
+def test_profile_dump(tmp_path):
+    intr = Interpreter()
+    intr.load_base(PROGRAM)
+    intr.start_profiling()
+    intr.answer("ancestor(X, d).")
+    path = tmp_path / "profile.json"
+    intr.dump_profile(str(path))
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == intr.stop_profiling()
+
+    with pytest.raises(ValueError):
+        intr.profile()
@@ -0,0 +1,47 @@
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.program_cache import ProgramCache
+
+PROGRAM = """
+% a comment. with a period
+:- table path/2.
+edge(a, b).
+edge(b, 'c. d').
+path(X, Y) :- edge(X, Y).
+path(X, Y) :- path(X, Z), edge(Z, Y).
+"""
+
+
+def test_split():
+    chunks = ProgramCache.split(PROGRAM)
+    assert len(chunks) == 5
+    assert "".join(chunks) == PROGRAM.rstrip()
+    assert ProgramCache.split("edge(a, b). edge(b") is None
+
+
+def test_unchanged_program_is_not_reloaded():
+    intr = Interpreter()
+    intr.load_base(PROGRAM)
+    kb = intr.kb
+    intr.load_base(PROGRAM)
+    assert intr.kb is kb
+    assert intr.answer("path(a, X).")
+
+
+def test_only_changed_clauses_are_parsed():
+    cache = ProgramCache()
+    cache.load(PROGRAM)
+    before = dict(cache.statements)
+    kb = cache.load(PROGRAM + "edge(c, d).\n")
+    for chunk, statements in before.items():
+        assert cache.statements[chunk] is statements
+    assert len(kb.clauses[("edge", 2)]) == 3
+
+
+def test_reload_after_assert():
+    intr = Interpreter()
+    intr.load_base(PROGRAM)
+    kb = intr.kb
+    intr.answer("assertz(edge(x, y)).")
+    intr.load_base(PROGRAM)
+    assert intr.kb is not kb
+    assert len(intr.kb.clauses[("edge", 2)]) == 2
@@ -0,0 +1,83 @@
+import pytest
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.prolog_parser import PrologParser
+from src.interpreter.snapshot import save_snapshot, load_snapshot
+
+PROGRAM = """
+:- table path/2.
+edge(a, b).
+edge(b, 'c d').
+edge(X, X).
+path(X, Y) :- path(X, Z), edge(Z, Y).
+path(X, Y) :- edge(X, Y).
+first([X, _], X).
+lonely(X) :- edge(X, _), not(edge(_, X)).
+"""
+
+
+def test_snapshot_round_trip(tmp_path):
+    kb = PrologParser(PROGRAM).parse_program()
+    path = str(tmp_path / "kb.snapshot")
+    save_snapshot(kb, path)
+
+    loaded = load_snapshot(path)
+
+    assert loaded == kb
+    assert loaded.tabled == kb.tabled
+    assert loaded.fact_tables == kb.fact_tables
+    assert loaded.indexes[("edge", 2)].by_atom == kb.indexes[("edge", 2)].by_atom
+    assert loaded.indexes[("edge", 2)].unbound == kb.indexes[("edge", 2)].unbound
+
+
+def test_snapshot_lazy(tmp_path):
+    kb = PrologParser(PROGRAM).parse_program()
+    path = str(tmp_path / "kb.snapshot")
+    save_snapshot(kb, path)
+
+    loaded = load_snapshot(path)
+    assert not [c for c in loaded.clauses[("edge", 2)]._items if c is not None]
+    assert ("edge", 2) not in dict(loaded.indexes)
+
+    assert str(loaded.clauses[("edge", 2)][1]) == "edge[b, 'c d']"
+    assert loaded.clauses[("edge", 2)]._items[0] is None
+
+
+def test_interpreter_snapshot(tmp_path):
+    path = str(tmp_path / "kb.snapshot")
+    interpreter = Interpreter()
+    interpreter.load_base(PROGRAM)
+    expected = [interpreter.answer(q) for q in ("path(a, Y).", "first([a, b], X).",
+                                                "lonely(X).")]
+    interpreter.save_snapshot(path)
+
+    restored = Interpreter()
+    restored.load_snapshot(path)
+    restored.kb.add_clause(PrologParser("edge(d, e).").parse_fact())
+
+    assert [restored.answer(q) for q in ("path(a, Y).", "first([a, b], X).",
+                                         "lonely(X).")] == expected
+    assert restored.answer("edge(d, Y).") == "true.\nY = d\ntrue.\nY = e\n"
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "kb.pl"
+    path.write_text(PROGRAM)
+
+    with pytest.raises(ValueError):
+        load_snapshot(str(path))
+
+
+def test_snapshot_updates(tmp_path):
+    path = str(tmp_path / "kb.snapshot")
+    save_snapshot(PrologParser("p(a, x).\np(b, y).\np(X, z).").parse_program(), path)
+    kb = load_snapshot(path)
+
+    kb.asserta(PrologParser("p(c, x).").parse_fact())
+    kb.retract(PrologParser("p(b, Y).").parse_fact())
+
+    assert [str(c) for c in kb.clauses_of(("p", 2))] == ["p[c, x]", "p[a, x]", "p[X, z]"]
+    assert list(kb.indexes[("p", 2)].candidates(PrologParser("p(W, z)").parse_predicate())) == [2]
+
+    path = str(tmp_path / "updated.snapshot")
+    save_snapshot(kb, path)
+    assert load_snapshot(path) == kb
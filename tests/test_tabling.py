@@ -0,0 +1,63 @@
+import pytest
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.prolog_parser import PrologParser
+from src.interpreter.terms import Fact, PList, Atom
+from src.interpreter.tabling import variant_key
+
+program = """:- table path/2.
+             e(a, b).
+             e(b, c).
+             e(c, a).
+             path(X, Y) :- path(X, Z), e(Z, Y).
+             path(X, Y) :- e(X, Y).
+          """
+
+
+@pytest.mark.parametrize("engine", Interpreter.ENGINES)
+def test_left_recursion(engine):
+    prolog: Interpreter = Interpreter(engine=engine)
+    prolog.load_base(program)
+
+    exp = """true.
+             Y = b
+             true.
+             Y = c
+             true.
+             Y = a"""
+
+    assert prolog.answer("path(a, Y).").split() == exp.split()
+
+
+def test_table_api():
+    kb = PrologParser("e(a, b).\ne(b, a).\n"
+                      "path(X, Y) :- path(X, Z), e(Z, Y).\n"
+                      "path(X, Y) :- e(X, Y).").parse_program()
+    kb.table("path", 2)
+    goal = PrologParser("path(a, Y).").parse_goal()
+
+    assert len(list(kb.answer_query(goal))) == 2
+    assert all(table.complete for table in kb.tables.values())
+
+    kb.add_clause(Fact("e", PList([Atom("a"), Atom("c")])))
+    assert not kb.tables
+    assert len(list(kb.answer_query(goal))) == 3
+
+
+def test_variants():
+    p1 = PrologParser("p(X, a, [Y, X])").parse_predicate()
+    p2 = PrologParser("p(Z, a, [W, Z])").parse_predicate()
+    p3 = PrologParser("p(Z, a, [Z, Z])").parse_predicate()
+
+    assert variant_key(p1) == variant_key(p2)
+    assert variant_key(p1) != variant_key(p3)
+
+
+def test_directive():
+    kb = PrologParser(":- table path/2, e/2.\ne(a, b).").parse_program()
+    assert kb.tabled == {("path", 2), ("e", 2)}
+
+    with pytest.raises(ValueError):
+        PrologParser(":- dynamic e/2.").parse_program()
+
+    with pytest.raises(ValueError):
+        PrologParser(":- table e.").parse_program()
@@ -0,0 +1,79 @@
+from src.interpreter.prolog_parser import PrologParser
+from src.interpreter.templates import ClauseTemplate, Slot
+from src.interpreter.unification import SubstitutionApplicator
+
+
+def test_slots():
+    rule = PrologParser("p(X, [a, Y], [b]) :- q(Y, X, Z).").parse_rule()
+    template = ClauseTemplate(rule)
+
+    assert template.names == ("X", "Y", "Z")
+    assert isinstance(template.head.arguments.elements[0], Slot)
+    assert template.head.arguments.elements[2] is rule.head.arguments.elements[2]
+
+
+def test_ground_clause_shared():
+    fact = PrologParser("p(a, [b]).").parse_fact()
+    template = ClauseTemplate(fact)
+
+    head, tail = template.instantiate()
+    assert template.size == 0
+    assert head is fact and not tail
+
+
+def test_fresh_variables():
+    rule = PrologParser("p(X, Y) :- q(Y, X).").parse_rule()
+    template = ClauseTemplate(rule)
+
+    head1, tail1 = template.instantiate()
+    head2, _ = template.instantiate()
+
+    x1, y1 = head1.arguments.elements
+    x2, _ = head2.arguments.elements
+
+    assert head1 == rule.head
+    assert x1 is not x2 and x1 is not rule.head.arguments.elements[0]
+    assert tail1[0].arguments.elements[0] is y1
+
+
+def match(clause, goal):
+    template = ClauseTemplate(clause)
+    frame, subs = template.frame(), {}
+    goal = PrologParser(goal).parse_predicate()
+    if not template.match(goal.arguments.elements, frame, subs):
+        return None
+
+    return SubstitutionApplicator(subs).sub_predicate(goal), frame
+
+
+def test_match_constants():
+    fact = PrologParser("p(a, b).").parse_fact()
+
+    assert str(match(fact, "p(a, Y)")[0]) == "p[a, b]"
+    assert match(fact, "p(b, Y)") is None
+    assert match(fact, "p(X, X)") is None
+    assert match(fact, "p([a], b)") is None
+
+
+def test_match_repeated_slots():
+    fact = PrologParser("p(X, X, [X, Y]).").parse_fact()
+
+    assert str(match(fact, "p(a, Z, W)")[0]) == "p[a, a, [a, Y]]"
+    assert match(fact, "p(a, b, W)") is None
+    assert str(match(fact, "p(a, Z, [Z, c])")[0]) == "p[a, a, [a, c]]"
+    assert match(fact, "p(a, Z, [b, c])") is None
+    assert match(fact, "p(Z, Z, [Z])") is None
+
+
+def test_match_fills_frame():
+    rule = PrologParser("p(X, [Y, a]) :- q(Y, X).").parse_rule()
+
+    head, frame = match(rule, "p(b, [c, A])")
+    assert str(head) == "p[b, [c, a]]"
+    assert [str(t) for t in frame] == ["b", "c"]
+    assert str(ClauseTemplate(rule).build_body(frame)) == "q[c, b]"
+
+
+def test_match_occurs_check():
+    assert match(PrologParser("p(X, [X]).").parse_fact(), "p(Y, Y)") is None
+    assert match(PrologParser("p([X], X).").parse_fact(), "p(Y, Y)") is None
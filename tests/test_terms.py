@@ -1,3 +1,4 @@
+import gc
 from src.interpreter.terms import Conjunction, Predicate,\
                                   PList, Variable, Atom
 
@@ -7,3 +8,56 @@ def test_var_extraction():
                                     Predicate("parent", PList([Variable("X"), Atom("Gosho")]))])
 
     assert c.variables == {'X': Variable("X")}
+
+
+def test_atom_hash():
+    assert hash(Atom("a")) == hash(Atom("'a'"))
+    assert {Atom("'a'"): 1}.get(Atom("a")) == 1
+
+
+def test_atom_interning():
+    assert Atom("a") is Atom("'a'")
+    assert Atom("a") is not Atom("b")
+    assert Atom("a").name == "a"
+
+
+def test_atom_printing():
+    assert str(Atom("'Maria'")) == "'Maria'"
+    assert str(Atom("'anne'")) == "anne"
+    assert str(Atom("'hello world'")) == "'hello world'"
+    assert str(Atom("42")) == "42"
+
+
+def test_compact_terms():
+    p = Predicate("p", PList([Atom("a"), Variable("X")]))
+
+    assert isinstance(p.arguments.elements, tuple)
+    assert not hasattr(p, "__dict__") and not hasattr(Variable("X"), "__dict__")
+    assert hash(PList([Atom("a")])) == hash(PList([Atom("a")]))
+
+
+def test_ground_lists():
+    ground = PList([Atom("a"), PList([Atom("b")])])
+    nested = PList([Atom("a"), PList([Variable("X")])])
+
+    assert ground.ground and PList([]).ground
+    assert not nested.ground and not PList([Variable("X")]).ground
+    assert ground == PList([Atom("a"), PList([Atom("b")])])
+    assert ground != PList([Atom("a"), PList([Atom("c")])])
+
+
+def test_unused_atoms_dropped():
+    atom = Atom("an_atom_used_once")
+    assert Atom.symbols["an_atom_used_once"] is atom
+
+    del atom
+    gc.collect()
+    assert "an_atom_used_once" not in Atom.symbols
+
+
+def test_equal_lists_hash_equal():
+    l1 = PList([Atom("a"), Variable("X"), PList([Variable("Y")])])
+    l2 = PList([Atom("a"), Variable("X"), PList([Variable("Y")])])
+
+    assert l1 == l2 and hash(l1) == hash(l2)
+    assert len({l1, l2}) == 1
@@ -67,3 +67,22 @@ def test_true():
     assert t.tokens == [('ATOM', 'is_is_not'), ('LPAREN', '('),
                         ('WILDCARD', '_'), ('RPAREN', ')'), ('IMPLICATION', ':-'),
                         ('TRUE', 'true'), ('PERIOD', '.')]
+
+
+def test_scan_positions():
+    t = Tokenizer()
+    tokens = t.scan("p(a). % comment\n/* block\ncomment */ q('x\ny').\n  r.")
+
+    assert next(tokens) == ('ATOM', 'p')
+    assert (t.line, t.column) == (1, 1)
+
+    rest = list(tokens)
+    assert ('QUOTED_ATOM', "'x\ny'") in rest
+    assert rest[-2:] == [('ATOM', 'r'), ('PERIOD', '.')]
+    assert (t.line, t.column) == (5, 4)
+
+
+def test_invalid_position():
+    t = Tokenizer()
+    with pytest.raises(ValueError, match="line 2, column 4"):
+        t.tokenize("p(a).\np(b$).")
@@ -1,6 +1,6 @@
 from src.interpreter.terms import Atom, Variable, PList,\
                                   Predicate, Conjunction
-from src.interpreter.unification import unify
+from src.interpreter.unification import unify, unify_into, SubstitutionApplicator
 
 def test_simple():
     t1 = Atom("a")
@@ -47,3 +47,40 @@ def test_conjunction():
 
     unif = unify(c1, c2)
     assert unif
+
+def test_ground_lists():
+    l1 = PList([Atom("a"), PList([Atom("b"), Atom("c")])])
+    l2 = PList([Atom("a"), PList([Atom("b"), Atom("c")])])
+    l3 = PList([Atom("a"), PList([Atom("b"), Atom("d")])])
+
+    assert unify(l1, l2) == {}
+    assert unify(l1, l3) is None
+    assert unify(l1, PList([Atom("a")])) is None
+
+def test_occurs_check():
+    x = Variable("X")
+
+    assert unify(x, PList([Atom("a"), x])) is None
+    assert unify(x, PList([Atom("a"), PList([Atom("b")])])) == {x: PList([Atom("a"), PList([Atom("b")])])}
+    assert unify(PList([x, x]), PList([Atom("a"), PList([x])])) is None
+
+def test_shared_bindings():
+    x, y, z = Variable("X"), Variable("Y"), Variable("Z")
+    p1 = Predicate("p", PList([x, y, PList([x])]))
+    p2 = Predicate("p", PList([y, z, PList([Atom("a")])]))
+
+    unif = unify(p1, p2)
+    sa = SubstitutionApplicator(unif)
+    assert sa.sub_predicate(p1) == sa.sub_predicate(p2)
+    assert sa.sub_term(z) is Atom("a")
+
+    assert unify(Predicate("p", PList([x, x])),
+                 Predicate("p", PList([Atom("a"), Atom("b")]))) is None
+
+def test_unify_into():
+    x, y = Variable("X"), Variable("Y")
+    subs = {x: Atom("a")}
+
+    assert unify_into(PList([x, y]), PList([Atom("a"), PList([])]), subs)
+    assert SubstitutionApplicator(subs).sub_term(PList([x, y])) == PList([Atom("a"), PList([])])
+    assert not unify_into(x, Atom("b"), subs)